@@ -12,6 +12,9 @@ class Settings:
     AWS_REGION = os.getenv('AWS_REGION', 'us-east-1')
     S3_BUCKET_NAME = os.getenv('S3_BUCKET_NAME')
     
+    # Logging
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    
     # NVIDIA NIM Configuration
     ENVIRONMENT = os.getenv('ENVIRONMENT', 'development')  # development or production
     NVIDIA_API_KEY = os.getenv('NVIDIA_API_KEY')
@@ -25,9 +28,21 @@ class Settings:
     # Embedding model configuration
     EMBEDDING_MODEL = "nvidia/llama-3.2-nv-embedqa-1b-v2"
     EMBEDDING_DIMENSION = 2048
+    EMBEDDING_BATCH_SIZE = int(os.getenv('EMBEDDING_BATCH_SIZE', '96'))  # Max texts per embeddings API call
+    EMBEDDING_MAX_WORKERS = int(os.getenv('EMBEDDING_MAX_WORKERS', '8'))  # Concurrent batch calls
+    EMBEDDING_CACHE_SIZE = int(os.getenv('EMBEDDING_CACHE_SIZE', '4096'))  # In-process LRU entries
+    EMBEDDING_MAX_CONCURRENCY = int(os.getenv('EMBEDDING_MAX_CONCURRENCY', '8'))  # Process-wide cap on in-flight embeddings API calls
+    SIMILARITY_KERNEL = os.getenv('SIMILARITY_KERNEL', 'blas')  # 'blas' (numpy matmul) or 'numba' (dimension-specialized kernel)
+    EMBEDDING_STORAGE_DTYPE = os.getenv('EMBEDDING_STORAGE_DTYPE', 'float32')  # 'float32' or 'float16' (half-size embeddings in DynamoDB)
+    VECTOR_QUANTIZATION = os.getenv('VECTOR_QUANTIZATION', 'none')  # 'none' (float32 rows) or 'int8' (per-row scaled int8, 4x smaller index, requires numba)
+    
+    # Vector snapshot configuration (S3 checkpoint of the in-memory vector store)
+    VECTOR_SNAPSHOT_DIR = os.getenv('VECTOR_SNAPSHOT_DIR', '/tmp/unimem-vectors')  # Local copy used for mmap
+    VECTOR_SNAPSHOT_MAX_AGE_MINUTES = int(os.getenv('VECTOR_SNAPSHOT_MAX_AGE_MINUTES', '60'))  # Older snapshots fall back to DynamoDB scan
+    VECTOR_SNAPSHOT_INTERVAL_MINUTES = int(os.getenv('VECTOR_SNAPSHOT_INTERVAL_MINUTES', '10'))  # Periodic checkpoint interval
     
     # File upload configuration
-    ALLOWED_EXTENSIONS = {'pdf', 'docx', 'txt', 'png', 'jpg', 'jpeg', 'gif', 'md'}
+    ALLOWED_EXTENSIONS = frozenset({'pdf', 'docx', 'txt', 'png', 'jpg', 'jpeg', 'gif', 'md'})
     MAX_FILE_SIZE = 100 * 1024 * 1024  # 100MB
     
     # User authentication configuration
@@ -1,4 +1,20 @@
 # main.py
+import queue
+import asyncio
+import logging
+from logging.handlers import QueueHandler, QueueListener
+from config import settings
+
+# Root logger configuration, done before importing services (they log while initializing)
+# Records are handed to a queue; a listener thread formats and writes them, so request
+# and sync code never block on stream I/O
+_log_queue = queue.SimpleQueue()
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(name)s] %(message)s"))
+logging.basicConfig(level=settings.LOG_LEVEL, handlers=[QueueHandler(_log_queue)])
+log_listener = QueueListener(_log_queue, _log_handler, respect_handler_level=True)
+log_listener.start()
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
@@ -8,7 +24,7 @@ from services.s3_service import s3_service
 from services.embedding_service import embedding_service
 from services.database_service import database_service
 from services.ai_agent_service import ai_agent_service
-from config import settings
+from services.integration_service import integration_service
 
 # Configure FastAPI application with authentication persistence
 app = FastAPI(
@@ -66,6 +82,25 @@ app.include_router(integration.router)  # Integration routes
 app.include_router(api_keys_router)  # API Keys routes
 app.include_router(memos_router)  # Read-only Memos API routes
 
+async def _snapshot_vectors_periodically():
+    """Checkpoint the in-memory vector store to S3 at a fixed interval"""
+    while True:
+        await asyncio.sleep(settings.VECTOR_SNAPSHOT_INTERVAL_MINUTES * 60)
+        await asyncio.to_thread(database_service.snapshot_vectors)
+
+@app.on_event("startup")
+async def start_background_tasks():
+    """Start periodic background tasks"""
+    app.state.snapshot_task = asyncio.create_task(_snapshot_vectors_periodically())
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    """Stop background tasks, write a final vector snapshot and close shared clients"""
+    app.state.snapshot_task.cancel()
+    await asyncio.to_thread(database_service.snapshot_vectors)
+    await integration_service.aclose()
+    log_listener.stop()
+
 @app.get("/")
 def root():
     """Root path - Service information"""
@@ -96,7 +131,7 @@ async def health_check():
     """Overall health check"""
     
     # Check S3 service
-    s3_health = s3_service.health_check()
+    s3_health = await asyncio.to_thread(s3_service.health_check)
     
     # Check Embedding service
     embedding_health = embedding_service.health_check()
@@ -1,5 +1,8 @@
 # AI Agent router
+import json
+from datetime import datetime
 from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional, List
 from services.ai_agent_service import ai_agent_service
@@ -68,6 +71,40 @@ async def chat_with_agent(request: ChatRequest, current_user: User = Depends(get
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Chat failed: {str(e)}")
 
+@router.post("/chat/stream")
+async def chat_with_agent_stream(request: ChatRequest, current_user: User = Depends(get_current_user)):
+    """
+    Chat with AI Agent, streaming the response as Server-Sent Events
+    
+    Each event is `data: {"delta": "..."}`; the last one is
+    `data: {"done": true, "conversation_id": "...", "timestamp": "..."}`,
+    or `data: {"error": "..."}` if generation failed (the partial turn is discarded)
+    
+    Example:
+        POST /api/agent/chat/stream
+        {
+            "message": "What did we discuss last week?",
+            "conversation_id": "conv_123",
+            "use_memory": true
+        }
+    """
+    conversation_id = request.conversation_id or f"conv_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}"
+    
+    async def event_stream():
+        try:
+            async for delta in ai_agent_service.chat_with_memory_stream(
+                user_input=request.message,
+                user_id=current_user.id,
+                conversation_id=conversation_id,
+                use_memory=request.use_memory
+            ):
+                yield f"data: {json.dumps({'delta': delta})}\n\n"
+            yield f"data: {json.dumps({'done': True, 'conversation_id': conversation_id, 'timestamp': datetime.utcnow().isoformat()})}\n\n"
+        except Exception as e:
+            yield f"data: {json.dumps({'error': f'Chat failed: {str(e)}'})}\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
 @router.get("/conversations")
 async def get_all_conversations():
     """
@@ -28,7 +28,7 @@ async def generate_embedding(request: EmbeddingRequest):
             input_type=request.input_type
         )
         return {
-            "embedding": embedding,
+            "embedding": embedding.tolist(),
             "dimension": len(embedding),
             "model": embedding_service.model
         }
@@ -1,4 +1,5 @@
 # Integrations router
+import logging
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import Optional
@@ -18,6 +19,8 @@ from routers.auth import get_current_active_user
 router = APIRouter(prefix="/api/integrations", tags=["integrations"])
 security = HTTPBearer()
 
+logger = logging.getLogger(__name__)
+
 @router.get("/{provider}/auth-url", response_model=IntegrationAuthUrlResponse)
 async def get_auth_url(
     provider: str,
@@ -90,9 +93,7 @@ async def connect_integration(
             detail=str(e)
         )
     except Exception as e:
-        print(f"❌ Connection failed (Exception): {type(e).__name__}: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Connection failed (Exception): %s: %s", type(e).__name__, e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to connect integration: {str(e)}"
@@ -162,15 +163,11 @@ async def list_integrations(
 ):
     """Get all user integrations"""
     try:
-        integrations = await integration_service.get_user_integrations(
+        # Summary projection: token attributes are never read from DynamoDB
+        integrations = await integration_service.list_user_integrations_summary(
             user_id=current_user.id
         )
         
-        # Remove sensitive information
-        for integration in integrations:
-            integration.access_token = None
-            integration.refresh_token = None
-        
         return IntegrationListResponse(
             integrations=integrations,
             total=len(integrations)
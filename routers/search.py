@@ -1,4 +1,5 @@
 # Search router
+import logging
 from fastapi import APIRouter, HTTPException, Query, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from typing import List, Optional
@@ -10,6 +11,8 @@ import json
 
 router = APIRouter(prefix="/api/search", tags=["search"])
 
+logger = logging.getLogger(__name__)
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(HTTPBearer())) -> User:
     """Get current user"""
     token = credentials.credentials
@@ -67,9 +70,7 @@ async def semantic_search(request: SearchRequest, current_user: User = Depends(g
         }
         
     except Exception as e:
-        import traceback
-        error_detail = f"Search failed: {str(e)}\nTraceback: {traceback.format_exc()}"
-        print(f"❌ Search error: {error_detail}")
+        logger.exception("Search error: %s", e)
         raise HTTPException(status_code=500, detail=f"Search failed: {str(e)}")
 
 @router.get("/memories")
@@ -169,9 +170,7 @@ async def get_related_memories(
     except HTTPException:
         raise
     except Exception as e:
-        import traceback
-        error_detail = f"Failed to get related memories: {str(e)}\nTraceback: {traceback.format_exc()}"
-        print(f"❌ {error_detail}")
+        logger.exception("Failed to get related memories: %s", e)
         raise HTTPException(status_code=500, detail=f"Failed to get related memories: {str(e)}")
 
 @router.delete("/memories/{memory_id}")
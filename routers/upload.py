@@ -1,4 +1,5 @@
 # Upload router
+import asyncio
 from fastapi import APIRouter, UploadFile, File, HTTPException, Query, Depends
 from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
@@ -58,9 +59,14 @@ async def upload_file(
                 response_data["memory"] = {
                     "memory_id": parse_result["memory_id"],
                     "parsed_content": parse_result["parsed_content"],
-                    "embedding_dimension": parse_result["embedding_dimension"]
+                    "embedding_dimension": parse_result["embedding_dimension"],
+                    "additional_memories": len(parse_result["additional_memories"]),
+                    "failed_chunks": parse_result["failed_chunks"]
                 }
-                response_data["message"] = "File uploaded and parsed successfully"
+                if parse_result["failed_chunks"]:
+                    response_data["message"] = f"File uploaded and parsed, but {parse_result['failed_chunks']} chunk(s) could not be stored"
+                else:
+                    response_data["message"] = "File uploaded and parsed successfully"
             except Exception as parse_error:
                 # Parse failure doesn't affect upload, but log the error
                 response_data["parse_error"] = str(parse_error)
@@ -71,6 +77,8 @@ async def upload_file(
             content=response_data
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
@@ -127,7 +135,7 @@ async def get_supported_types():
 async def upload_health_check():
     """Check upload and parse service health status"""
     try:
-        s3_health = s3_service.health_check()
+        s3_health = await asyncio.to_thread(s3_service.health_check)
         parser_health = parser_service.health_check()
         
         overall_status = "healthy" if (
@@ -1,6 +1,6 @@
 # schemas.py
-from pydantic import BaseModel, EmailStr
-from typing import List, Optional
+from pydantic import BaseModel, EmailStr, Field
+from typing import Dict, List, Optional
 from datetime import datetime
 
 # File upload related
@@ -135,6 +135,8 @@ class Integration(IntegrationBase):
     token_expires_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
+    # Legacy Google Drive sync state, read once to migrate it to the drive file state table (internal only)
+    drive_file_state: Optional[Dict[str, Dict[str, str]]] = Field(default=None, exclude=True)
 
 class IntegrationAuthUrlRequest(BaseModel):
     redirect_uri: Optional[str] = None
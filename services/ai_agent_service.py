@@ -1,5 +1,6 @@
 # AI Agent service
-from typing import List, Dict, Any, Optional
+import asyncio
+from typing import List, Dict, Any, Optional, AsyncIterator
 from datetime import datetime
 from services.database_service import database_service
 from services.embedding_service import embedding_service
@@ -44,14 +45,16 @@ class AIAgentService:
             
             # If memory retrieval is enabled, search for relevant memories
             relevant_memories = []
+            query_embedding = None
             if use_memory:
-                relevant_memories = await self._retrieve_relevant_memories(cleaned_input, user_id)
+                query_embedding = self._embed_query(cleaned_input)
+                relevant_memories = await self._retrieve_relevant_memories(query_embedding, user_id)
             
             # Build context
             context = self._build_context(relevant_memories, conversation_id)
             
             # Generate response (using NVIDIA NIM LLM)
-            response = await self._generate_response(cleaned_input, context, conversation_id)
+            response = await self._generate_response(cleaned_input, context, conversation_id, user_id, query_embedding)
             
             # Save conversation turn
             self._save_conversation_turn(user_input, response, conversation_id)
@@ -79,15 +82,86 @@ class AIAgentService:
                 'error': str(e)
             }
     
-    async def _retrieve_relevant_memories(self, query: str, user_id: str) -> List[Dict[str, Any]]:
-        """Retrieve relevant memories"""
+    async def chat_with_memory_stream(
+        self,
+        user_input: str,
+        user_id: str,
+        conversation_id: str = None,
+        use_memory: bool = True
+    ) -> AsyncIterator[str]:
+        """
+        Memory-based conversation, streaming the response as it is generated
+        
+        Args:
+            user_input: User input
+            user_id: User ID
+            conversation_id: Conversation ID
+            use_memory: Whether to use memory retrieval
+            
+        Yields:
+            str: Response text deltas; the full turn is saved once the stream ends
+            
+        Raises:
+            Exception: If generation fails mid-stream; the partial turn is not saved
+        """
+        cleaned_input = clean_text(user_input)
+        
+        relevant_memories = []
+        query_embedding = None
+        if use_memory:
+            query_embedding = self._embed_query(cleaned_input)
+            relevant_memories = await self._retrieve_relevant_memories(query_embedding, user_id)
+        context = self._build_context(relevant_memories, conversation_id)
+        
+        conversation_history = []
+        if conversation_id and conversation_id in self.conversation_history:
+            conversation_history = self.conversation_history[conversation_id]
+        
+        # The NIM client is blocking: pull each chunk in a worker thread so the event loop stays free
+        chunks = llm_service.generate_response_stream(
+            user_input=cleaned_input,
+            context=context,
+            conversation_history=conversation_history,
+            user_id=user_id,
+            query_embedding=query_embedding
+        )
+        parts = []
+        try:
+            while True:
+                chunk = await asyncio.to_thread(next, chunks, None)
+                if chunk is None:
+                    break
+                parts.append(chunk)
+                yield chunk
+        finally:
+            # Client disconnected or generation failed: stop the NIM stream. If a worker thread is
+            # still pulling a chunk (cancelled mid-await) the generator is closed once it is released.
+            try:
+                chunks.close()
+            except ValueError:
+                pass
+        
+        response = ''.join(parts)
+        self._save_conversation_turn(user_input, response, conversation_id)
+        if self._should_create_memory(response):
+            await self._create_conversation_memory(user_input, response, user_id, conversation_id)
+    
+    def _embed_query(self, query: str) -> Optional[List[float]]:
+        """Generate the query embedding (shared by retrieval and the LLM response cache)"""
         try:
-            # Generate query embedding
-            query_embedding = embedding_service.generate_embedding(
+            return embedding_service.generate_embedding(
                 text=query,
                 input_type="query"
             )
-            
+        except Exception as e:
+            print(f"❌ Query embedding failed: {e}")
+            return None
+    
+    async def _retrieve_relevant_memories(self, query_embedding: Optional[List[float]], user_id: str) -> List[Dict[str, Any]]:
+        """Retrieve relevant memories"""
+        if query_embedding is None:
+            return []
+        try:
             # Search for relevant memories
             search_results = database_service.semantic_search(
                 query_embedding=query_embedding,
@@ -129,7 +203,14 @@ class AIAgentService:
         
         return "\n".join(context_parts)
     
-    async def _generate_response(self, user_input: str, context: str, conversation_id: str = None) -> str:
+    async def _generate_response(
+        self,
+        user_input: str,
+        context: str,
+        conversation_id: str = None,
+        user_id: str = None,
+        query_embedding: Optional[List[float]] = None
+    ) -> str:
         """Generate AI response (using NVIDIA NIM LLM)"""
         try:
             # Get conversation history
@@ -141,7 +222,9 @@ class AIAgentService:
             response = llm_service.generate_response(
                 user_input=user_input,
                 context=context,
-                conversation_history=conversation_history
+                conversation_history=conversation_history,
+                user_id=user_id,
+                query_embedding=query_embedding
             )
             
             return response
@@ -1,13 +1,32 @@
 # Database Service
+import io
+import os
 import json
+import time
 import uuid
-from datetime import datetime
-from typing import List, Optional, Dict, Any
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import List, Optional, Dict, Any, Tuple, Union
 from config import settings
 import boto3
+from boto3.dynamodb.types import Binary
 from botocore.exceptions import ClientError
 import numpy as np
 from schemas import MemoryUnit, SearchResult
+from utils.memory_utils import make_cosine_kernel, make_int8_dot_kernel, quantize_int8
+from services.s3_service import s3_service
+
+logger = logging.getLogger(__name__)
+
+# Initial row capacity of a user's vector matrix (doubled when full)
+INITIAL_VECTOR_CAPACITY = 64
+
+# DynamoDB BatchGetItem accepts at most 100 keys per request
+BATCH_GET_LIMIT = 100
+
+# Snapshot file name for vectors without an owner (user IDs are UUIDs, so this cannot collide)
+OWNERLESS_SNAPSHOT_NAME = "_ownerless"
 
 class DatabaseService:
     """
@@ -40,9 +59,30 @@ class DatabaseService:
         self._init_tables()
         
         # In-memory vector store (for fast search)
+        # vector_store: memory_id -> {'memory_id', 'user_id', 'row'}
+        # _user_vectors: user_id -> {'matrix': (capacity, D) float32 unit vectors, 'count': n, 'ids': [memory_id per row]}
+        # with VECTOR_QUANTIZATION=int8, 'matrix' holds int8 codes and 'scales' (capacity,) float32 holds row = codes * scale
         self.vector_store = {}
+        self._user_vectors = {}
+        self._vector_lock = threading.Lock()
+        self._quantized = settings.VECTOR_QUANTIZATION == 'int8'
+        self._storage_dtype = settings.EMBEDDING_STORAGE_DTYPE
+        
+        # Similarity kernel specialized to the embedding dimension (opt-in, compiled at startup)
+        self._kernel = None
+        self._kernel_dim = None
+        self._ensure_kernel(settings.EMBEDDING_DIMENSION)
+        if self._quantized and self._kernel is None:
+            # numpy would upcast the whole int8 matrix to float32 on every query
+            logger.warning("VECTOR_QUANTIZATION=int8 needs numba for int8 dot products, storing float32 rows")
+            self._quantized = False
+        
+        # Vector snapshot location (S3) - bumped version marks the store as changed since last snapshot
+        self.snapshot_prefix = f"vectors/{settings.ENVIRONMENT}"
+        self._vector_version = 0
+        self._snapshot_version = 0
         
-        # Load existing vectors from DynamoDB to memory
+        # Load existing vectors (S3 snapshot first, DynamoDB scan as fallback)
         self._load_vectors_to_memory()
     
     def _init_tables(self):
@@ -126,47 +166,385 @@ class DatabaseService:
                 raise
     
     def _load_vectors_to_memory(self):
-        """Load vectors from DynamoDB to memory"""
+        """Load vectors to memory from the S3 snapshot, reconciled against DynamoDB"""
         if self.dynamodb_disabled:
-            print("⚠️  DynamoDB disabled, skipping vector loading")
+            logger.warning("DynamoDB disabled, skipping vector loading")
             return
-            
+        
+        if self._load_vector_snapshot():
+            self._reconcile_snapshot()
+        else:
+            self._scan_vectors()
+        self._snapshot_version = self._vector_version
+    
+    def _scan_vectors(self):
+        """Load all vectors from DynamoDB"""
         try:
             vectors_table = self.dynamodb.Table(self.embeddings_table_name)
-            response = vectors_table.scan()
+            scan_kwargs = {}
             
             loaded_count = 0
-            for item in response.get('Items', []):
-                memory_id = item['id']
-                decimal_embedding = item['embedding']
+            while True:
+                response = vectors_table.scan(**scan_kwargs)
+                for item in response.get('Items', []):
+                    memory_id = item['id']
+                    embedding = self._decode_embedding(item['embedding'], item.get('embedding_dtype', 'float32'))
+                    
+                    # Store in memory vector store
+                    self._add_vector(memory_id, item.get('user_id'), embedding)
+                    loaded_count += 1
                 
-                # Convert Decimal back to float
-                float_embedding = [float(x) for x in decimal_embedding]
-                
-                # Store in memory vector store
-                self.vector_store[memory_id] = {
-                    'embedding': np.array(float_embedding),
-                    'memory_id': memory_id,
-                    'user_id': item.get('user_id')  # ✅ Add this line!
-                }
-                loaded_count += 1
+                if 'LastEvaluatedKey' not in response:
+                    break
+                scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
             
-            print(f"✅ Loaded {loaded_count} vectors from DynamoDB to memory")
+            logger.info("Loaded %d vectors from DynamoDB to memory", loaded_count)
             
         except Exception as e:
-            print(f"⚠️  Failed to load vectors from DynamoDB: {e}")
+            logger.warning("Failed to load vectors from DynamoDB: %s", e)
             # Don't throw exception, allow system to continue
     
+    def _reconcile_snapshot(self):
+        """
+        Bring snapshot-loaded vectors in line with the embeddings table
+        
+        Only IDs are scanned: vectors deleted since the snapshot are dropped, and
+        vectors missing from it (written after it, or while it was being taken)
+        are fetched by ID with BatchGetItem.
+        """
+        try:
+            vectors_table = self.dynamodb.Table(self.embeddings_table_name)
+            scan_kwargs = {'ProjectionExpression': 'id'}
+            table_ids = set()
+            while True:
+                response = vectors_table.scan(**scan_kwargs)
+                table_ids.update(item['id'] for item in response.get('Items', []))
+                if 'LastEvaluatedKey' not in response:
+                    break
+                scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+            
+            with self._vector_lock:
+                stale_ids = [memory_id for memory_id in self.vector_store if memory_id not in table_ids]
+                for memory_id in stale_ids:
+                    self._remove_vector_locked(memory_id)
+                missing_ids = [memory_id for memory_id in table_ids if memory_id not in self.vector_store]
+            
+            for start in range(0, len(missing_ids), BATCH_GET_LIMIT):
+                keys = [{'id': memory_id} for memory_id in missing_ids[start:start + BATCH_GET_LIMIT]]
+                request = {self.embeddings_table_name: {'Keys': keys}}
+                while request:
+                    response = self.dynamodb.batch_get_item(RequestItems=request)
+                    for item in response.get('Responses', {}).get(self.embeddings_table_name, []):
+                        embedding = self._decode_embedding(item['embedding'], item.get('embedding_dtype', 'float32'))
+                        self._add_vector(item['id'], item.get('user_id'), embedding)
+                    request = response.get('UnprocessedKeys')
+            
+            logger.info("Reconciled vector snapshot: %d deleted vectors dropped, %d new vectors loaded", len(stale_ids), len(missing_ids))
+            
+        except Exception as e:
+            logger.warning("Failed to reconcile vector snapshot with DynamoDB: %s", e)
+    
+    @staticmethod
+    def _snapshot_name(user_id: Optional[str]) -> str:
+        """File name stem of a user's snapshot files"""
+        return OWNERLESS_SNAPSHOT_NAME if user_id is None else user_id
+    
+    @staticmethod
+    def _decode_embedding(raw_embedding, dtype: str = 'float32') -> np.ndarray:
+        """Decode a stored embedding attribute into a float32 vector"""
+        if isinstance(raw_embedding, Binary):
+            # Raw float32 bytes: view the buffer directly, no copy and no Python loop
+            if dtype == 'float16':
+                return np.frombuffer(raw_embedding.value, dtype=np.float16).astype(np.float32)
+            return np.frombuffer(raw_embedding.value, dtype=np.float32)
+        # Legacy items: list of Decimal, converted element-wise straight into the array
+        return np.fromiter(raw_embedding, dtype=np.float32, count=len(raw_embedding))
+    
+    def _load_vector_snapshot(self) -> Optional[str]:
+        """
+        Load per-user vector matrices from the S3 snapshot
+        
+        Matrices are downloaded to VECTOR_SNAPSHOT_DIR and memory-mapped, so pages are
+        read lazily and shared between workers through the page cache.
+        
+        Returns:
+            Optional[str]: Snapshot timestamp, or None if missing/stale/unreadable
+        """
+        client = s3_service.client
+        bucket = s3_service.bucket_name
+        try:
+            response = client.get_object(Bucket=bucket, Key=f"{self.snapshot_prefix}/manifest.json")
+            manifest = json.loads(response['Body'].read())
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('NoSuchKey', '404'):
+                logger.info("No vector snapshot found, scanning DynamoDB")
+            else:
+                logger.warning("Failed to read vector snapshot manifest: %s", e)
+            return None
+        except Exception as e:
+            logger.warning("Failed to read vector snapshot manifest: %s", e)
+            return None
+        
+        snapshot_at = manifest['created_at']
+        if manifest.get('quantization', 'none') != self._quantization:
+            logger.warning("Vector snapshot quantization differs from the vector store's, scanning DynamoDB")
+            return None
+        max_age = timedelta(minutes=settings.VECTOR_SNAPSHOT_MAX_AGE_MINUTES)
+        if datetime.utcnow() - datetime.fromisoformat(snapshot_at) > max_age:
+            logger.warning("Vector snapshot from %s is stale, scanning DynamoDB", snapshot_at)
+            return None
+        
+        try:
+            os.makedirs(settings.VECTOR_SNAPSHOT_DIR, exist_ok=True)
+            user_vectors = {}
+            vector_store = {}
+            for user_id in manifest['users']:
+                name = self._snapshot_name(user_id)
+                local_path = os.path.join(settings.VECTOR_SNAPSHOT_DIR, f"{name}.npy")
+                client.download_file(bucket, f"{self.snapshot_prefix}/{name}.npy", local_path)
+                response = client.get_object(Bucket=bucket, Key=f"{self.snapshot_prefix}/{name}.ids.json")
+                ids = json.loads(response['Body'].read())
+                
+                # Copy-on-write mapping: rows stay on disk until touched, in-place
+                # updates (row swaps on delete) never write back to the file
+                matrix = np.load(local_path, mmap_mode='c')
+                if matrix.shape[0] != len(ids):
+                    raise ValueError(f"snapshot for user {user_id} has {matrix.shape[0]} rows but {len(ids)} ids")
+                
+                block = {'matrix': matrix, 'count': len(ids), 'ids': ids}
+                if self._quantized:
+                    scales_path = os.path.join(settings.VECTOR_SNAPSHOT_DIR, f"{name}.scales.npy")
+                    client.download_file(bucket, f"{self.snapshot_prefix}/{name}.scales.npy", scales_path)
+                    block['scales'] = np.load(scales_path, mmap_mode='c')
+                user_vectors[user_id] = block
+                for row, memory_id in enumerate(ids):
+                    vector_store[memory_id] = {'memory_id': memory_id, 'user_id': user_id, 'row': row}
+        except Exception as e:
+            logger.warning("Failed to load vector snapshot: %s", e)
+            return None
+        
+        with self._vector_lock:
+            self._user_vectors = user_vectors
+            self.vector_store = vector_store
+            for block in user_vectors.values():
+                self._ensure_kernel(block['matrix'].shape[1])
+        
+        logger.info("Loaded %d vectors for %d users from snapshot %s", len(vector_store), len(user_vectors), snapshot_at)
+        return snapshot_at
+    
+    def snapshot_vectors(self) -> bool:
+        """
+        Checkpoint the in-memory vector store to S3
+        
+        Writes one `.npy` matrix and id list per user (vectors without an owner
+        under OWNERLESS_SNAPSHOT_NAME), then the manifest, so a reader never sees
+        a manifest pointing at missing files.
+        
+        Returns:
+            bool: True if a snapshot was written
+        """
+        if self.dynamodb_disabled:
+            return False
+        
+        # Timestamp taken before copying (snapshot age is checked against it on load)
+        snapshot_at = datetime.utcnow().isoformat()
+        with self._vector_lock:
+            if self._vector_version == self._snapshot_version:
+                return False
+            version = self._vector_version
+            blocks = {
+                user_id: (
+                    block['matrix'][:block['count']].copy(),
+                    block['scales'][:block['count']].copy() if self._quantized else None,
+                    list(block['ids'])
+                )
+                for user_id, block in self._user_vectors.items()
+                if block['count'] > 0
+            }
+        
+        client = s3_service.client
+        bucket = s3_service.bucket_name
+        try:
+            for user_id, (matrix, scales, ids) in blocks.items():
+                name = self._snapshot_name(user_id)
+                buffer = io.BytesIO()
+                np.save(buffer, matrix)
+                buffer.seek(0)
+                client.upload_fileobj(buffer, bucket, f"{self.snapshot_prefix}/{name}.npy")
+                if scales is not None:
+                    buffer = io.BytesIO()
+                    np.save(buffer, scales)
+                    buffer.seek(0)
+                    client.upload_fileobj(buffer, bucket, f"{self.snapshot_prefix}/{name}.scales.npy")
+                client.put_object(
+                    Bucket=bucket,
+                    Key=f"{self.snapshot_prefix}/{name}.ids.json",
+                    Body=json.dumps(ids).encode('utf-8'),
+                    ContentType='application/json'
+                )
+            
+            manifest = {
+                'created_at': snapshot_at,
+                'quantization': self._quantization,
+                'users': list(blocks.keys())
+            }
+            client.put_object(
+                Bucket=bucket,
+                Key=f"{self.snapshot_prefix}/manifest.json",
+                Body=json.dumps(manifest).encode('utf-8'),
+                ContentType='application/json'
+            )
+        except Exception as e:
+            logger.error("Failed to snapshot vectors: %s", e)
+            return False
+        
+        self._snapshot_version = version
+        logger.info("Vector snapshot written: %d vectors, %d users", sum(len(ids) for _, _, ids in blocks.values()), len(blocks))
+        return True
+    
+    def _add_vector(self, memory_id: str, user_id: str, embedding: np.ndarray):
+        """Append a normalized vector to the user's matrix, doubling capacity when full"""
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector = vector / norm
+        
+        with self._vector_lock:
+            if memory_id in self.vector_store:
+                self._remove_vector_locked(memory_id)
+            
+            block = self._user_vectors.get(user_id)
+            if block is None:
+                self._ensure_kernel(vector.shape[0])
+                block = {
+                    'matrix': np.empty((INITIAL_VECTOR_CAPACITY, vector.shape[0]), dtype=self._row_dtype),
+                    'count': 0,
+                    'ids': []
+                }
+                if self._quantized:
+                    block['scales'] = np.empty(INITIAL_VECTOR_CAPACITY, dtype=np.float32)
+                self._user_vectors[user_id] = block
+            
+            count = block['count']
+            matrix = block['matrix']
+            if count == matrix.shape[0]:
+                # Amortized O(1) append: grow geometrically instead of vstack per insert
+                grown = np.empty((matrix.shape[0] * 2, matrix.shape[1]), dtype=self._row_dtype)
+                grown[:count] = matrix[:count]
+                block['matrix'] = matrix = grown
+                if self._quantized:
+                    scales = np.empty(grown.shape[0], dtype=np.float32)
+                    scales[:count] = block['scales'][:count]
+                    block['scales'] = scales
+            
+            if self._quantized:
+                matrix[count], block['scales'][count] = self._quantize(vector)
+            else:
+                matrix[count] = vector
+            block['ids'].append(memory_id)
+            block['count'] = count + 1
+            self._vector_version += 1
+            self.vector_store[memory_id] = {
+                'memory_id': memory_id,
+                'user_id': user_id,
+                'row': count
+            }
+    
+    @property
+    def _quantization(self) -> str:
+        """Effective VECTOR_QUANTIZATION (int8 falls back to 'none' without numba)"""
+        return 'int8' if self._quantized else 'none'
+    
+    @property
+    def _row_dtype(self):
+        return np.int8 if self._quantized else np.float32
+    
+    @staticmethod
+    def _quantize(vector: np.ndarray) -> Tuple[np.ndarray, float]:
+        """Quantize a vector to int8 codes with a per-vector scale (vector ~= codes * scale)"""
+        return quantize_int8(vector)
+    
+    def _ensure_kernel(self, dim: int):
+        """Compile the dimension-specialized similarity kernel once (always for int8 rows, opt-in for float32)"""
+        if self._kernel_dim == dim:
+            return
+        if self._quantized:
+            self._kernel = make_int8_dot_kernel(dim)
+        elif settings.SIMILARITY_KERNEL == 'numba':
+            self._kernel = make_cosine_kernel(dim)
+            if self._kernel is None:
+                logger.warning("SIMILARITY_KERNEL=numba but numba is not installed, using numpy matmul")
+        else:
+            return
+        self._kernel_dim = dim
+        if self._kernel is None:
+            return
+        # Warm up: trigger JIT compilation (or cache load) now instead of on the first search
+        self._kernel(np.zeros((1, dim), dtype=self._row_dtype), 1, np.zeros(dim, dtype=self._row_dtype))
+    
+    def _similarities(self, block: Dict[str, Any], query: np.ndarray) -> np.ndarray:
+        """Cosine similarity of the block's (unit-normalized) rows against a unit query"""
+        matrix = block['matrix']
+        count = block['count']
+        if self._quantized:
+            # Quantized query, int8 x int8 products accumulated in int32, rescaled back to float32 cosine
+            codes, scale = self._quantize(query)
+            if matrix.shape[1] == self._kernel_dim:
+                dots = self._kernel(np.asarray(matrix), count, codes)
+            else:
+                dots = (matrix[:count].astype(np.int32) @ codes.astype(np.int32)).astype(np.float32)
+            return dots * (block['scales'][:count] * np.float32(scale))
+        if self._kernel is not None and matrix.shape[1] == query.shape[0] == self._kernel_dim:
+            return self._kernel(np.asarray(matrix), count, query)
+        return matrix[:count] @ query
+    
+    def _remove_vector(self, memory_id: str):
+        """Remove a vector from the in-memory store"""
+        with self._vector_lock:
+            self._remove_vector_locked(memory_id)
+    
+    def _remove_vector_locked(self, memory_id: str):
+        """Remove a vector by moving the user's last row into its slot (caller holds the lock)"""
+        entry = self.vector_store.pop(memory_id, None)
+        if entry is None:
+            return
+        
+        block = self._user_vectors[entry['user_id']]
+        row = entry['row']
+        last = block['count'] - 1
+        if row != last:
+            moved_id = block['ids'][last]
+            block['matrix'][row] = block['matrix'][last]
+            if self._quantized:
+                block['scales'][row] = block['scales'][last]
+            block['ids'][row] = moved_id
+            self.vector_store[moved_id]['row'] = row
+        block['ids'].pop()
+        block['count'] = last
+        self._vector_version += 1
+    
+    def _get_vector(self, memory_id: str) -> Optional[np.ndarray]:
+        """Get a copy of a stored (normalized) vector"""
+        with self._vector_lock:
+            entry = self.vector_store.get(memory_id)
+            if entry is None:
+                return None
+            block = self._user_vectors[entry['user_id']]
+            if self._quantized:
+                return block['matrix'][entry['row']].astype(np.float32) * block['scales'][entry['row']]
+            return block['matrix'][entry['row']].copy()
+    
     def create_memory(
         self,
         content: str,
         memory_type: str,
-        embedding: List[float],
+        embedding: Union[np.ndarray, List[float]],
         user_id: str,
         metadata: Dict[str, Any] = None,
         source: str = None,
         summary: str = None,
-        tags: List[str] = None
+        tags: List[str] = None,
+        memory_id: str = None
     ) -> str:
         """
         Create new memory unit
@@ -174,21 +552,100 @@ class DatabaseService:
         Args:
             content: Memory content
             memory_type: Memory type (text, image, audio, document)
-            embedding: Vector embedding
+            embedding: Vector embedding (np.ndarray or list of floats)
             user_id: User ID
             metadata: Metadata
             source: Source
             summary: Summary
             tags: Tags
+            memory_id: Explicit memory ID (e.g. from source_memory_id), random UUID if omitted
             
         Returns:
             str: Memory ID
         """
         if self.dynamodb_disabled:
-            print("⚠️  DynamoDB disabled, memory not persisted")
+            logger.warning("DynamoDB disabled, memory not persisted")
             return None
             
-        memory_id = str(uuid.uuid4())
+        memory_data, vector_data, vector = self._build_memory_items(
+            content, memory_type, embedding, user_id, metadata, source, summary, tags, memory_id
+        )
+        memory_id = memory_data['id']
+        
+        # Store to database
+        try:
+            # Store memory metadata in DynamoDB
+            memories_table = self.dynamodb.Table(self.memories_table_name)
+            memories_table.put_item(Item=memory_data)
+            
+            # Store vector data in DynamoDB
+            vectors_table = self.dynamodb.Table(self.embeddings_table_name)
+            vectors_table.put_item(Item=vector_data)
+            
+            # Also store in memory (for fast search)
+            self._add_vector(memory_id, user_id, vector)
+            
+            logger.debug("Memory created: %s (%d-dim vector)", memory_id, len(vector))
+            return memory_id
+            
+        except Exception as e:
+            logger.error("Failed to create memory: %s", e)
+            raise
+    
+    def create_memories(self, memories: List[Dict[str, Any]]) -> List[str]:
+        """
+        Create multiple memory units with batched writes
+        
+        Args:
+            memories: List of dicts with the same keys as create_memory arguments
+            
+        Returns:
+            List[str]: Memory IDs, in input order
+        """
+        if self.dynamodb_disabled:
+            logger.warning("DynamoDB disabled, memories not persisted")
+            return []
+        if not memories:
+            return []
+        
+        built = [self._build_memory_items(**memory) for memory in memories]
+        
+        try:
+            # batch_writer packs puts into 25-item BatchWriteItem calls and resends UnprocessedItems
+            memories_table = self.dynamodb.Table(self.memories_table_name)
+            with memories_table.batch_writer(overwrite_by_pkeys=['id']) as writer:
+                for memory_data, _, _ in built:
+                    writer.put_item(Item=memory_data)
+            
+            vectors_table = self.dynamodb.Table(self.embeddings_table_name)
+            with vectors_table.batch_writer(overwrite_by_pkeys=['id']) as writer:
+                for _, vector_data, _ in built:
+                    writer.put_item(Item=vector_data)
+            
+            for memory_data, _, vector in built:
+                self._add_vector(memory_data['id'], memory_data['user_id'], vector)
+            
+            logger.debug("Memories created in batch: %d", len(built))
+            return [memory_data['id'] for memory_data, _, _ in built]
+            
+        except Exception as e:
+            logger.error("Failed to create memories: %s", e)
+            raise
+    
+    def _build_memory_items(
+        self,
+        content: str,
+        memory_type: str,
+        embedding: Union[np.ndarray, List[float]],
+        user_id: str,
+        metadata: Dict[str, Any] = None,
+        source: str = None,
+        summary: str = None,
+        tags: List[str] = None,
+        memory_id: str = None
+    ) -> Tuple[Dict[str, Any], Dict[str, Any], np.ndarray]:
+        """Build the memory item, vector item and float32 vector for a new memory"""
+        memory_id = memory_id or str(uuid.uuid4())
         now = datetime.utcnow().isoformat()
         
         # Prepare memory data
@@ -205,44 +662,21 @@ class DatabaseService:
             'tags': tags or []
         }
         
-        # Prepare vector data - convert float to Decimal
-        from decimal import Decimal
-        
-        # Convert floats in embedding to Decimal
-        decimal_embedding = [Decimal(str(float(x))) for x in embedding]
+        # Prepare vector data - stored as raw float32 (or float16) bytes (DynamoDB Binary)
+        vector = np.asarray(embedding, dtype=np.float32)
         
         vector_data = {
             'id': memory_id,
             'user_id': user_id,
-            'embedding': decimal_embedding,  # Store Decimal type vector
+            'embedding': vector.tobytes(),
             'memory_id': memory_id,
             'created_at': now
         }
+        if self._storage_dtype == 'float16':
+            vector_data['embedding'] = vector.astype(np.float16).tobytes()
+            vector_data['embedding_dtype'] = 'float16'
         
-        # Store to database
-        try:
-            # Store memory metadata in DynamoDB
-            memories_table = self.dynamodb.Table(self.memories_table_name)
-            memories_table.put_item(Item=memory_data)
-            
-            # Store vector data in DynamoDB
-            vectors_table = self.dynamodb.Table(self.embeddings_table_name)
-            vectors_table.put_item(Item=vector_data)
-            
-            # Also store in memory (for fast search)
-            self.vector_store[memory_id] = {
-                'embedding': np.array(embedding),
-                'memory_id': memory_id,
-                'user_id': user_id 
-            }
-            
-            print(f"✅ Memory created: {memory_id}")
-            print(f"✅ Vector stored: {len(embedding)} dimensions")
-            return memory_id
-            
-        except Exception as e:
-            print(f"❌ Failed to create memory: {e}")
-            raise
+        return memory_data, vector_data, vector
     
     def semantic_search(
         self,
@@ -263,46 +697,61 @@ class DatabaseService:
         Returns:
             List[Dict]: Search results
         """
-        import time
         start_time = time.time()
         
-        query_vector = np.array(query_embedding)
+        query_vector = np.asarray(query_embedding, dtype=np.float32)
+        query_norm = np.linalg.norm(query_vector)
         results = []
         
-        # Calculate similarity (using cosine similarity)
-        print(f"🔍 Searching in {len(self.vector_store)} vectors with threshold {threshold} for user {user_id}")
+        logger.debug("Searching in %d vectors with threshold %s for user %s", len(self.vector_store), threshold, user_id)
         
-        for memory_id, vector_data in self.vector_store.items():
-            # Check if belongs to current user
-            if vector_data.get('user_id') != user_id:
-                continue
-                
-            embedding = vector_data['embedding']
-            
-            # Calculate cosine similarity
-            similarity = np.dot(query_vector, embedding) / (
-                np.linalg.norm(query_vector) * np.linalg.norm(embedding)
-            )
-            
-            print(f"📊 Memory {memory_id[:8]}... similarity: {similarity:.4f}")
+        if query_norm == 0:
+            return results
+        
+        # Cosine similarity against all of the user's vectors in one matrix-vector product
+        # (stored rows are unit-normalized, so cosine == dot product)
+        with self._vector_lock:
+            block = self._user_vectors.get(user_id)
+            if not block or block['count'] == 0:
+                return results
+            similarities = self._similarities(block, query_vector / query_norm)
+            candidates = np.nonzero(similarities >= threshold)[0]
+            row_ids = list(block['ids'])
+        
+        # Rank candidates in windows of `limit`: each window is selected in O(M) and only its
+        # winners get fully ordered; later windows are only needed when stale or foreign ids
+        # (deleted in another worker, not yet reconciled) were filtered out of earlier ones
+        scores = similarities[candidates]
+        remaining = np.arange(len(candidates))
+        while len(remaining) and len(results) < limit:
+            if len(remaining) > limit:
+                partitioned = np.argpartition(-scores[remaining], limit)
+                window, remaining = remaining[partitioned[:limit]], remaining[partitioned[limit:]]
+            else:
+                window, remaining = remaining, remaining[:0]
+            window = window[np.argsort(-scores[window])]
             
-            if similarity >= threshold:
+            for index in window:
+                memory_id = row_ids[candidates[index]]
+                similarity = float(scores[index])
+                logger.debug("Memory %s similarity: %.4f", memory_id, similarity)
+                
                 # Get memory metadata
                 memory = self.get_memory_by_id(memory_id)
                 if memory and memory.get('user_id') == user_id:
                     results.append({
                         'memory': memory,
-                        'similarity_score': float(similarity),
+                        'similarity_score': similarity,
                         'search_time': time.time() - start_time
                     })
-                    print(f"✅ Added result: {memory_id[:8]}... (similarity: {similarity:.4f})")
+                    logger.debug("Added result: %s (similarity: %.4f)", memory_id, similarity)
+                    if len(results) == limit:
+                        break
                 else:
-                    print(f"⚠️  Memory not found or not owned by user for {memory_id[:8]}...")
-        
-        # Sort by similarity
-        results.sort(key=lambda x: x['similarity_score'], reverse=True)
+                    logger.debug("Memory not found or not owned by user for %s", memory_id)
         
-        return results[:limit]
+        # Windows are visited best-first, so results are already ordered by similarity
+        return results
     
     def get_memory_by_id(self, memory_id: str) -> Optional[Dict[str, Any]]:
         """Get memory by ID"""
@@ -318,7 +767,41 @@ class DatabaseService:
             return None
             
         except Exception as e:
-            print(f"❌ Failed to get memory {memory_id}: {e}")
+            logger.error("Failed to get memory %s: %s", memory_id, e)
+            return None
+    
+    @staticmethod
+    def source_memory_id(user_id: str, source_id: str, content_hash: str) -> str:
+        """Deterministic memory ID for synced content (same source + content -> same ID)"""
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{user_id}:{source_id}:{content_hash}"))
+    
+    def get_memory_by_source_hash(self, user_id: str, source_id: str, content_hash: str) -> Optional[Dict[str, Any]]:
+        """
+        Check whether synced content was already stored
+        
+        Args:
+            user_id: User ID
+            source_id: Source identifier (e.g. notion_<page_id>)
+            content_hash: SHA-256 of the content
+            
+        Returns:
+            Dict: The stored memory's `id` and `metadata.approximate_embedding` flag if this exact
+            content was already stored, otherwise None
+        """
+        if self.dynamodb_disabled:
+            return None
+        
+        memory_id = self.source_memory_id(user_id, source_id, content_hash)
+        try:
+            table = self.dynamodb.Table(self.memories_table_name)
+            response = table.get_item(
+                Key={'id': memory_id},
+                ProjectionExpression='id, #meta.approximate_embedding',
+                ExpressionAttributeNames={'#meta': 'metadata'}
+            )
+            return response.get('Item')
+        except Exception as e:
+            logger.error("Failed to check memory %s: %s", memory_id, e)
             return None
     
     def get_memories(
@@ -375,7 +858,7 @@ class DatabaseService:
             return memories[offset:offset + limit]
             
         except Exception as e:
-            print(f"❌ Failed to get memories: {e}")
+            logger.error("Failed to get memories: %s", e)
             return []
     
     def get_related_memories(
@@ -387,22 +870,23 @@ class DatabaseService:
         """Get related memories"""
         try:
             # 1. Get current memory's vector
-            if memory_id not in self.vector_store:
-                print(f"⚠️  Memory {memory_id} not found in vector store")
+            vector_data = self.vector_store.get(memory_id)
+            if vector_data is None:
+                logger.debug("Memory %s not found in vector store", memory_id)
                 return []
             
-            vector_data = self.vector_store[memory_id]
-            
             # 2. Verify user permission
             if vector_data.get('user_id') != user_id:
-                print(f"⚠️  Memory {memory_id} does not belong to user {user_id}")
+                logger.debug("Memory %s does not belong to user %s", memory_id, user_id)
                 return []
             
-            current_embedding = vector_data['embedding']
+            current_embedding = self._get_vector(memory_id)
+            if current_embedding is None:
+                return []
             
             # 3. ✅ Search related memories (pass user_id)
             results = self.semantic_search(
-                query_embedding=current_embedding.tolist(),
+                query_embedding=current_embedding,
                 user_id=user_id,  # ✅ Add user_id parameter
                 limit=limit + 1,
                 threshold=0.5
@@ -411,13 +895,11 @@ class DatabaseService:
             # 4. Filter out itself
             related = [r for r in results if r['memory']['id'] != memory_id]
             
-            print(f"✅ Found {len(related)} related memories for {memory_id}")
+            logger.debug("Found %d related memories for %s", len(related), memory_id)
             return related[:limit]
             
         except Exception as e:
-            print(f"❌ Failed to get related memories: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Failed to get related memories: %s", e)
             return []
 
     def delete_memory(self, memory_id: str) -> bool:
@@ -432,15 +914,13 @@ class DatabaseService:
             vectors_table.delete_item(Key={'id': memory_id})
             
             # Delete from memory vector store
-            if memory_id in self.vector_store:
-                del self.vector_store[memory_id]
+            self._remove_vector(memory_id)
             
-            print(f"✅ Memory deleted: {memory_id}")
-            print(f"✅ Vector deleted: {memory_id}")
+            logger.debug("Memory and vector deleted: %s", memory_id)
             return True
             
         except Exception as e:
-            print(f"❌ Failed to delete memory {memory_id}: {e}")
+            logger.error("Failed to delete memory %s: %s", memory_id, e)
             return False
     
     def get_search_stats(self) -> Dict[str, Any]:
@@ -455,7 +935,7 @@ class DatabaseService:
             
             # Statistics by type
             type_stats = {}
-            for memory_id in self.vector_store.keys():
+            for memory_id in list(self.vector_store.keys()):
                 memory = self.get_memory_by_id(memory_id)
                 if memory:
                     memory_type = memory.get('memory_type', 'unknown')
@@ -470,7 +950,7 @@ class DatabaseService:
             }
             
         except Exception as e:
-            print(f"❌ Failed to get stats: {e}")
+            logger.exception("Failed to get stats: %s", e)
             return {
                 'total_memories': 0,
                 'vector_count': 0,
@@ -0,0 +1,212 @@
+# Embedding Cache Service
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from typing import Optional, Union, List, Dict
+from config import settings
+from cachetools import LRUCache
+import boto3
+from boto3.dynamodb.types import Binary
+from botocore.exceptions import ClientError
+import numpy as np
+from utils.memory_utils import minhash_signature, MINHASH_PERMUTATIONS
+
+logger = logging.getLogger(__name__)
+
+# Estimated Jaccard similarity above which a stored embedding is reused for edited content
+NEAR_DUPLICATE_THRESHOLD = 0.9
+# Max remembered signatures per user (oldest entries are evicted first)
+NEAR_DUPLICATE_INDEX_SIZE = 2000
+# Max remembered signatures across all users (least recently used users are evicted first)
+NEAR_DUPLICATE_MAX_ENTRIES = 20000
+# DynamoDB BatchGetItem accepts at most 100 keys per request
+BATCH_GET_LIMIT = 100
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache - maps SHA-256(content) + model to a stored embedding
+    Lets re-syncs of unchanged content skip the embeddings API entirely
+    """
+    
+    def __init__(self):
+        self.dynamodb = boto3.resource(
+            'dynamodb',
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+            region_name=settings.AWS_REGION
+        )
+        self.table_name = f"unimem-embedding-cache-{settings.ENVIRONMENT}"
+        self.disabled = False
+        self._init_table()
+        self.table = self.dynamodb.Table(self.table_name) if not self.disabled else None
+        
+        # In-process near-duplicate index: user_id -> {'signatures': (n, P) uint64, 'embeddings': [np.ndarray]}
+        # sized by entry count, so the whole index stays under NEAR_DUPLICATE_MAX_ENTRIES
+        self._near_index = LRUCache(
+            maxsize=NEAR_DUPLICATE_MAX_ENTRIES,
+            getsizeof=lambda index: len(index['embeddings'])
+        )
+        self._near_lock = threading.Lock()
+    
+    def _init_table(self):
+        """Initialize the cache table (the cache is disabled if it cannot be accessed)"""
+        try:
+            self.dynamodb.Table(self.table_name).load()
+            logger.debug("Table already exists: %s", self.table_name)
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ResourceNotFoundException':
+                try:
+                    logger.info("Creating table: %s", self.table_name)
+                    self.dynamodb.create_table(
+                        TableName=self.table_name,
+                        KeySchema=[
+                            {'AttributeName': 'id', 'KeyType': 'HASH'}
+                        ],
+                        AttributeDefinitions=[
+                            {'AttributeName': 'id', 'AttributeType': 'S'}
+                        ],
+                        BillingMode='PAY_PER_REQUEST'
+                    )
+                    return
+                except ClientError as create_error:
+                    e = create_error
+            logger.warning("Embedding cache disabled, table %s unavailable: %s", self.table_name, e)
+            self.disabled = True
+    
+    @staticmethod
+    def content_hash(text: str) -> str:
+        """SHA-256 hex digest of the text content"""
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+    
+    @staticmethod
+    def _cache_id(content_hash: str, model: str) -> str:
+        return f"{model}#{content_hash}"
+    
+    def get(self, content_hash: str, model: str) -> Optional[np.ndarray]:
+        """
+        Look up a cached embedding
+        
+        Args:
+            content_hash: content_hash() of the embedded text
+            model: Embedding model name
+        
+        Returns:
+            np.ndarray: float32 embedding, or None on miss
+        """
+        if self.disabled:
+            return None
+        try:
+            response = self.table.get_item(Key={'id': self._cache_id(content_hash, model)})
+        except Exception as e:
+            logger.warning("Embedding cache lookup failed: %s", e)
+            return None
+        
+        item = response.get('Item')
+        if not item:
+            return None
+        return np.frombuffer(item['embedding'].value, dtype=np.float32)
+    
+    def set(self, content_hash: str, model: str, embedding: Union[np.ndarray, List[float]]):
+        """Store an embedding (failures are logged, never raised)"""
+        if self.disabled:
+            return
+        try:
+            self.table.put_item(Item={
+                'id': self._cache_id(content_hash, model),
+                'model': model,
+                'embedding': Binary(np.asarray(embedding, dtype=np.float32).tobytes()),
+                'created_at': datetime.utcnow().isoformat()
+            })
+        except Exception as e:
+            logger.warning("Embedding cache write failed: %s", e)
+    
+    def get_many(self, content_hashes: List[str], model: str) -> Dict[str, np.ndarray]:
+        """
+        Look up several cached embeddings with BatchGetItem
+        
+        Args:
+            content_hashes: content_hash() values of the embedded texts
+            model: Embedding model name
+        
+        Returns:
+            Dict: content_hash -> float32 embedding, for hits only
+        """
+        if self.disabled or not content_hashes:
+            return {}
+        
+        ids = list(dict.fromkeys(self._cache_id(h, model) for h in content_hashes))
+        found = {}
+        try:
+            for start in range(0, len(ids), BATCH_GET_LIMIT):
+                request = {self.table_name: {'Keys': [{'id': i} for i in ids[start:start + BATCH_GET_LIMIT]]}}
+                while request:
+                    response = self.dynamodb.batch_get_item(RequestItems=request)
+                    for item in response.get('Responses', {}).get(self.table_name, []):
+                        found[item['id']] = np.frombuffer(item['embedding'].value, dtype=np.float32)
+                    request = response.get('UnprocessedKeys')
+        except Exception as e:
+            logger.warning("Embedding cache batch lookup failed: %s", e)
+        
+        prefix = f"{model}#"
+        return {cache_id[len(prefix):]: embedding for cache_id, embedding in found.items()}
+    
+    def set_many(self, entries: Dict[str, Union[np.ndarray, List[float]]], model: str):
+        """Store several embeddings keyed by content hash (failures are logged, never raised)"""
+        if self.disabled or not entries:
+            return
+        created_at = datetime.utcnow().isoformat()
+        try:
+            with self.table.batch_writer(overwrite_by_pkeys=['id']) as writer:
+                for content_hash, embedding in entries.items():
+                    writer.put_item(Item={
+                        'id': self._cache_id(content_hash, model),
+                        'model': model,
+                        'embedding': Binary(np.asarray(embedding, dtype=np.float32).tobytes()),
+                        'created_at': created_at
+                    })
+        except Exception as e:
+            logger.warning("Embedding cache batch write failed: %s", e)
+    
+    def find_near_duplicate(self, user_id: str, text: str) -> Optional[np.ndarray]:
+        """
+        Find the embedding of previously embedded, nearly identical content (e.g. a small edit)
+        
+        The result only approximates the content's own embedding; callers should mark it
+        as such and embed the content properly later.
+        
+        Args:
+            user_id: User ID
+            text: Content about to be embedded
+            
+        Returns:
+            np.ndarray: Stored embedding if MinHash similarity exceeds NEAR_DUPLICATE_THRESHOLD, otherwise None
+        """
+        signature = minhash_signature(text)
+        with self._near_lock:
+            index = self._near_index.get(user_id)
+            if not index:
+                return None
+            scores = (index['signatures'] == signature).mean(axis=1)
+            best = int(np.argmax(scores))
+            if scores[best] < NEAR_DUPLICATE_THRESHOLD:
+                return None
+            return index['embeddings'][best]
+    
+    def remember(self, user_id: str, text: str, embedding: Union[np.ndarray, List[float]]):
+        """Add embedded content to the user's near-duplicate index"""
+        signature = minhash_signature(text)
+        vector = np.asarray(embedding, dtype=np.float32)
+        with self._near_lock:
+            index = self._near_index.get(user_id)
+            if index is None:
+                index = {'signatures': np.empty((0, MINHASH_PERMUTATIONS), dtype=np.uint64), 'embeddings': []}
+            index = {
+                'signatures': np.vstack([index['signatures'][-(NEAR_DUPLICATE_INDEX_SIZE - 1):], signature]),
+                'embeddings': index['embeddings'][-(NEAR_DUPLICATE_INDEX_SIZE - 1):] + [vector]
+            }
+            # Re-inserting re-measures the user's size and evicts other users if over the cap
+            self._near_index[user_id] = index
+
+# Global instance
+embedding_cache = EmbeddingCache()
@@ -1,6 +1,11 @@
 # Embedding Service
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from cachetools import LRUCache
 from openai import OpenAI
-from typing import List
+from typing import List, Optional
 from config import settings
 
 class EmbeddingService:
@@ -28,12 +33,36 @@ class EmbeddingService:
             api_key=settings.NVIDIA_API_KEY
         )
         self.model = settings.EMBEDDING_MODEL
+        
+        # In-process LRU cache for repeated texts (queries are re-issued often)
+        self._cache = LRUCache(maxsize=settings.EMBEDDING_CACHE_SIZE)
+        self._cache_lock = threading.Lock()
+        self._cache_hits = 0
+        self._cache_misses = 0
+        
+        # Caps in-flight API calls across all threads (a batch takes one slot) to stay under provider limits
+        self._request_slots = threading.BoundedSemaphore(max(1, settings.EMBEDDING_MAX_CONCURRENCY))
+    
+    def _cache_key(self, text: str, input_type: str) -> tuple:
+        """Build cache key from content hash (128-bit BLAKE2b), input type and model"""
+        return (hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest(), input_type, self.model)
+    
+    def peek(self, text: str, input_type: str = "passage") -> Optional[np.ndarray]:
+        """Return the cached embedding for text without calling the API (None on miss)"""
+        key = self._cache_key(text, input_type)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache_hits += 1
+            else:
+                self._cache_misses += 1
+            return cached
     
     def generate_embedding(
         self, 
         text: str, 
         input_type: str = "passage"
-    ) -> List[float]:
+    ) -> np.ndarray:
         """
         Generate embedding for single text
         
@@ -42,19 +71,36 @@ class EmbeddingService:
             input_type: "passage" (document) or "query" (query)
         
         Returns:
-            List[float]: Embedding vector
+            np.ndarray: float32 embedding vector (read-only, may be shared via cache)
         """
+        key = self._cache_key(text, input_type)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache_hits += 1
+                return cached
+            self._cache_misses += 1
+        
+        embedding = self._request_embedding(text, input_type)
+        embedding.setflags(write=False)
+        with self._cache_lock:
+            self._cache[key] = embedding
+        return embedding
+    
+    def _request_embedding(self, text: str, input_type: str) -> np.ndarray:
+        """Call the embeddings API for a single text (no caching)"""
         try:
-            response = self.client.embeddings.create(
-                input=[text],
-                model=self.model,
-                encoding_format="float",
-                extra_body={
-                    "input_type": input_type,
-                    "truncate": "NONE"
-                }
-            )
-            embedding = response.data[0].embedding
+            with self._request_slots:
+                response = self.client.embeddings.create(
+                    input=[text],
+                    model=self.model,
+                    encoding_format="float",
+                    extra_body={
+                        "input_type": input_type,
+                        "truncate": "NONE"
+                    }
+                )
+            embedding = np.asarray(response.data[0].embedding, dtype=np.float32)
             print(f"✅ Generated embedding, dimension: {len(embedding)}")
             return embedding
         except Exception as e:
@@ -76,23 +122,73 @@ class EmbeddingService:
         Returns:
             List[List[float]]: List of embedding vectors
         """
-        embeddings = []
-        for i, text in enumerate(texts):
-            print(f"🔄 Processing {i+1}/{len(texts)}")
-            embedding = self.generate_embedding(text, input_type)
-            embeddings.append(embedding)
+        if not texts:
+            return []
+        
+        # Split into sublists that fit the provider's per-call input cap
+        batch_size = max(1, settings.EMBEDDING_BATCH_SIZE)
+        batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+        print(f"🔄 Embedding {len(texts)} texts in {len(batches)} request(s)")
+        
+        if len(batches) == 1:
+            return self._embed_batch(batches[0], input_type)
+        
+        # Dispatch batches concurrently, map() preserves input order
+        workers = min(settings.EMBEDDING_MAX_WORKERS, len(batches))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(lambda batch: self._embed_batch(batch, input_type), batches)
+            return [embedding for batch_embeddings in results for embedding in batch_embeddings]
+    
+    def _embed_batch(self, texts: List[str], input_type: str) -> List[List[float]]:
+        """Embed a list of texts with a single API call"""
+        with self._request_slots:
+            response = self.client.embeddings.create(
+                input=texts,
+                model=self.model,
+                encoding_format="float",
+                extra_body={
+                    "input_type": input_type,
+                    "truncate": "NONE"
+                }
+            )
+        # Results carry an index; sort to be safe against out-of-order responses
+        embeddings = [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+        
+        # Remember results so repeated texts can be served by peek()/generate_embedding()
+        entries = []
+        for text, embedding in zip(texts, embeddings):
+            vector = np.asarray(embedding, dtype=np.float32)
+            vector.setflags(write=False)
+            entries.append((self._cache_key(text, input_type), vector))
+        with self._cache_lock:
+            for key, vector in entries:
+                self._cache[key] = vector
         return embeddings
     
+    def get_cache_stats(self) -> dict:
+        """Get embedding cache statistics"""
+        with self._cache_lock:
+            total = self._cache_hits + self._cache_misses
+            return {
+                "size": len(self._cache),
+                "max_size": self._cache.maxsize,
+                "hits": self._cache_hits,
+                "misses": self._cache_misses,
+                "hit_rate": self._cache_hits / total if total else 0.0
+            }
+    
     def health_check(self) -> dict:
         """Health check: test if embedding service is working properly"""
         try:
-            test_embedding = self.generate_embedding("health check test", "query")
+            # Bypass the cache so the check really reaches the API
+            test_embedding = self._request_embedding("health check test", "query")
             return {
                 "status": "healthy",
                 "environment": settings.ENVIRONMENT,
                 "base_url": self.base_url,
                 "model": self.model,
-                "embedding_dimension": len(test_embedding)
+                "embedding_dimension": len(test_embedding),
+                "cache": self.get_cache_stats()
             }
         except Exception as e:
             return {
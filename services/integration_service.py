@@ -1,18 +1,56 @@
 # Integrations Service
-import json
-import uuid
 import hmac
 import hashlib
 import base64
+import time
+import asyncio
+import logging
+import tempfile
+import weakref
+from contextlib import AsyncExitStack
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Union
 from urllib.parse import urlencode, urlparse, parse_qs
-import requests
+import httpx
 from config import settings
 import boto3
+import aioboto3
+from boto3.dynamodb.types import Binary
+from botocore.config import Config
 from botocore.exceptions import ClientError
+from cachetools import TTLCache
 from cryptography.fernet import Fernet
 from schemas import Integration, IntegrationCreate
+from services.notion_extract import extract_page_title, extract_text_from_blocks
+
+logger = logging.getLogger(__name__)
+
+# Max Google Drive files downloaded/processed concurrently during a sync
+DRIVE_SYNC_CONCURRENCY = 8
+DRIVE_DOWNLOAD_CHUNK_SIZE = 1 << 20  # 1 MB
+DRIVE_SPOOL_MAX_MEMORY = 8 << 20  # Buffer downloads in memory up to 8 MB, then spill to disk
+
+# Metadata shared by every memory created from a Google Drive file
+_DRIVE_BASE_METADATA = {'source': 'google-drive'}
+
+# Max Notion pages fetched/processed concurrently during a sync
+NOTION_SYNC_CONCURRENCY = 16
+NOTION_API_URL = "https://api.notion.com/v1"
+NOTION_API_VERSION = "2022-06-28"
+
+# Attributes returned when listing integrations (encrypted tokens are never fetched)
+INTEGRATION_SUMMARY_FIELDS = [
+    'id', 'user_id', 'provider', 'account', 'connected',
+    'last_sync', 'token_expires_at', 'created_at', 'updated_at'
+]
+
+# In-process cache of resolved (user_id, provider) integrations
+INTEGRATION_CACHE_SIZE = 10000
+INTEGRATION_CACHE_TTL = 60  # seconds
+
+# Token cipher: key derived from SECRET_KEY once at import, shared by all instances
+_FERNET_KEY = base64.urlsafe_b64encode(hashlib.sha256(settings.SECRET_KEY.encode()).digest())
+_CIPHER = Fernet(_FERNET_KEY)
 
 class IntegrationService:
     """
@@ -20,6 +58,26 @@ class IntegrationService:
     Handles OAuth authorization, token management, and data synchronization
     """
     
+    # Google Drive MIME types supported for sync -> file extension used for parsing
+    _SUPPORTED_MIME_TYPES = {
+        'application/pdf': 'pdf',
+        'application/vnd.google-apps.document': 'docx',  # Google Docs
+        'application/vnd.openxmlformats-officedocument.wordprocessingml.document': 'docx',
+        'application/vnd.openxmlformats-officedocument.presentationml.presentation': 'pptx',  # PowerPoint
+        'application/vnd.ms-powerpoint.presentation.macroEnabled.12': 'pptx',  # PowerPoint (macro-enabled)
+        'application/vnd.google-apps.presentation': 'pptx',  # Google Slides
+        'text/plain': 'txt',
+        'text/markdown': 'md',
+        'image/png': 'png',
+        'image/jpeg': 'jpg',
+        'image/jpg': 'jpg',
+        'image/gif': 'gif'
+    }
+    
+    # Drive query: only supported file types, exclude folders and deleted files
+    # Note: Google Apps types (like Google Slides) need special handling
+    _DRIVE_MIME_QUERY = '(' + ' or '.join(f"mimeType='{mime}'" for mime in _SUPPORTED_MIME_TYPES) + ') and trashed=false'
+    
     def __init__(self):
         # Check AWS configuration
         if (not settings.AWS_ACCESS_KEY_ID or 
@@ -27,31 +85,113 @@ class IntegrationService:
             raise ValueError("AWS configuration incomplete")
         
         # DynamoDB client
+        # Larger connection pool for concurrent sync workers, adaptive retries, TCP keepalive
+        boto_config = Config(
+            max_pool_connections=64,
+            retries={'mode': 'adaptive', 'max_attempts': 10},
+            tcp_keepalive=True
+        )
+        self._boto_config = boto_config
         self.dynamodb = boto3.resource(
             'dynamodb',
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+            region_name=settings.AWS_REGION,
+            config=boto_config
+        )
+        
+        # Async DynamoDB resource for the request path (opened lazily on first use)
+        self._session = aioboto3.Session(
             aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
             aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
             region_name=settings.AWS_REGION
         )
+        self._async_stack = AsyncExitStack()
+        self._async_table = None
+        self._async_file_state_table = None
+        self._async_table_lock = asyncio.Lock()
         
-        # Table name
+        # Integration lookup cache; per-key locks so concurrent misses issue one query
+        self._integration_cache = TTLCache(maxsize=INTEGRATION_CACHE_SIZE, ttl=INTEGRATION_CACHE_TTL)
+        self._integration_locks = weakref.WeakValueDictionary()
+        
+        # Table names
         self.table_name = f"unimem-integrations-{settings.ENVIRONMENT}"
+        self._table = self.dynamodb.Table(self.table_name)
+        # Google Drive per-file sync state, one item per (integration_id, file_id)
+        self.file_state_table_name = f"unimem-drive-file-state-{settings.ENVIRONMENT}"
         
-        # Initialize table
+        # Initialize tables
         self._init_table()
+        self._init_file_state_table()
         
         # Initialize encryption key (generated using SECRET_KEY)
         self._init_encryption()
+        
+        # Keyed HMAC template for OAuth state; copied per signature instead of re-keying
+        self._hmac_template = hmac.new(settings.OAUTH_STATE_SECRET.encode(), None, hashlib.sha256)
+        
+        # OAuth client credentials are fixed for the process lifetime, build them once
+        notion_credentials = base64.b64encode(f"{settings.NOTION_CLIENT_ID}:{settings.NOTION_CLIENT_SECRET}".encode()).decode()
+        self._notion_token_headers = {
+            'Authorization': f'Basic {notion_credentials}',
+            'Content-Type': 'application/json'
+        }
+        self._google_token_base = {
+            'client_id': settings.GOOGLE_CLIENT_ID,
+            'client_secret': settings.GOOGLE_CLIENT_SECRET
+        }
+        
+        # Shared HTTP client: keep-alive connections are reused across OAuth/API calls
+        self._http = httpx.AsyncClient(
+            timeout=10,
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+            http2=True
+        )
+        
+        # Dedicated Notion API client: pages are fetched with a wide fan-out during sync
+        self._notion = httpx.AsyncClient(
+            base_url=NOTION_API_URL,
+            headers={'Notion-Version': NOTION_API_VERSION},
+            timeout=30,
+            limits=httpx.Limits(max_connections=32, keepalive_expiry=60),
+            http2=True
+        )
+    
+    async def aclose(self):
+        """Close the shared HTTP clients and async DynamoDB resource"""
+        await self._http.aclose()
+        await self._notion.aclose()
+        await self._async_stack.aclose()
+        self._async_table = None
+        self._async_file_state_table = None
+    
+    async def _get_table(self):
+        """Get the async DynamoDB table, opening the shared resource on first use"""
+        if self._async_table is None:
+            async with self._async_table_lock:
+                if self._async_table is None:
+                    dynamodb = await self._async_stack.enter_async_context(
+                        self._session.resource('dynamodb', config=self._boto_config)
+                    )
+                    self._async_file_state_table = await dynamodb.Table(self.file_state_table_name)
+                    self._async_table = await dynamodb.Table(self.table_name)
+        return self._async_table
+    
+    async def _get_file_state_table(self):
+        """Get the async Google Drive file state table"""
+        await self._get_table()
+        return self._async_file_state_table
     
     def _init_table(self):
         """Initialize DynamoDB table"""
         try:
             try:
-                self.dynamodb.Table(self.table_name).load()
-                print(f"📋 Integrations table already exists: {self.table_name}")
+                self._table.load()
+                logger.info("Integrations table already exists: %s", self.table_name)
             except ClientError as e:
                 if e.response['Error']['Code'] == 'ResourceNotFoundException':
-                    print(f"🔨 Creating integrations table: {self.table_name}")
+                    logger.info("Creating integrations table: %s", self.table_name)
                     table = self.dynamodb.create_table(
                         TableName=self.table_name,
                         KeySchema=[
@@ -74,59 +214,88 @@ class IntegrationService:
                         ],
                         BillingMode='PAY_PER_REQUEST'
                     )
-                    print(f"✅ Integrations table created: {self.table_name}")
+                    logger.info("Integrations table created: %s", self.table_name)
                 else:
-                    print(f"⚠️  Error checking integrations table: {e}")
+                    logger.warning("Error checking integrations table: %s", e)
         except ClientError as e:
-            print(f"⚠️  DynamoDB access error: {e}")
+            logger.warning("DynamoDB access error: %s", e)
+    
+    def _init_file_state_table(self):
+        """Initialize the Google Drive file state table"""
+        try:
+            try:
+                self.dynamodb.Table(self.file_state_table_name).load()
+                logger.info("Drive file state table already exists: %s", self.file_state_table_name)
+            except ClientError as e:
+                if e.response['Error']['Code'] == 'ResourceNotFoundException':
+                    logger.info("Creating drive file state table: %s", self.file_state_table_name)
+                    self.dynamodb.create_table(
+                        TableName=self.file_state_table_name,
+                        KeySchema=[
+                            {'AttributeName': 'integration_id', 'KeyType': 'HASH'},
+                            {'AttributeName': 'file_id', 'KeyType': 'RANGE'}
+                        ],
+                        AttributeDefinitions=[
+                            {'AttributeName': 'integration_id', 'AttributeType': 'S'},
+                            {'AttributeName': 'file_id', 'AttributeType': 'S'}
+                        ],
+                        BillingMode='PAY_PER_REQUEST'
+                    )
+                    logger.info("Drive file state table created: %s", self.file_state_table_name)
+                else:
+                    logger.warning("Error checking drive file state table: %s", e)
+        except ClientError as e:
+            logger.warning("DynamoDB access error: %s", e)
     
     def _init_encryption(self):
         """Initialize encryption key"""
-        # Generate Fernet key using SECRET_KEY
-        key = hashlib.sha256(settings.SECRET_KEY.encode()).digest()
-        key_b64 = base64.urlsafe_b64encode(key)
-        self.cipher = Fernet(key_b64)
+        # Reuse the module-level cipher (key derived from SECRET_KEY at import)
+        self.cipher = _CIPHER
     
-    def _encrypt_token(self, token: str) -> str:
-        """Encrypt token"""
+    def _encrypt_token(self, token: str) -> bytes:
+        """Encrypt token (stored as DynamoDB Binary)"""
         if not token:
-            return ""
-        return self.cipher.encrypt(token.encode()).decode()
+            return b""
+        return self.cipher.encrypt(token.encode())
     
-    def _decrypt_token(self, encrypted_token: str) -> str:
-        """Decrypt token"""
+    def _decrypt_token(self, encrypted_token: Union[Binary, bytes, str]) -> str:
+        """Decrypt token (accepts Binary/bytes, or str for legacy rows)"""
+        if isinstance(encrypted_token, Binary):
+            encrypted_token = encrypted_token.value
         if not encrypted_token:
             return ""
         try:
-            return self.cipher.decrypt(encrypted_token.encode()).decode()
+            # Fernet accepts both bytes and str tokens, so no re-encoding is needed
+            return self.cipher.decrypt(encrypted_token).decode()
         except Exception:
             return ""
     
+    def _decrypt_items(self, items: List[Dict[str, Any]]):
+        """Decrypt the token attributes of many integration items in place"""
+        decrypt = self._decrypt_token
+        for item in items:
+            if 'access_token' in item:
+                item['access_token'] = decrypt(item['access_token'])
+            if 'refresh_token' in item:
+                item['refresh_token'] = decrypt(item['refresh_token'])
+    
+    def _sign_state(self, message: str) -> str:
+        """HMAC-SHA256 signature of an OAuth state message (unpadded urlsafe base64 of the raw digest)"""
+        h = self._hmac_template.copy()
+        h.update(message.encode())
+        return base64.urlsafe_b64encode(h.digest()).rstrip(b'=').decode('ascii')
+    
     def _generate_oauth_state(self, user_id: str, provider: str) -> str:
-        """Generate OAuth state parameter (prevent CSRF)"""
-        timestamp = str(int(datetime.now().timestamp()))
+        """Generate OAuth state parameter (prevent CSRF), format: user_id.provider.timestamp.signature"""
+        timestamp = str(int(time.time()))
         message = f"{user_id}:{provider}:{timestamp}"
-        signature = hmac.new(
-            settings.OAUTH_STATE_SECRET.encode(),
-            message.encode(),
-            hashlib.sha256
-        ).hexdigest()
-        state_data = {
-            'user_id': user_id,
-            'provider': provider,
-            'timestamp': timestamp,
-            'signature': signature
-        }
-        return base64.urlsafe_b64encode(json.dumps(state_data).encode()).decode()
+        signature = self._sign_state(message)
+        return f"{user_id}.{provider}.{timestamp}.{signature}"
     
     def _verify_oauth_state(self, state: str, provider: str) -> Optional[str]:
         """Verify OAuth state and return user_id"""
         try:
-            state_data = json.loads(base64.urlsafe_b64decode(state.encode()).decode())
-            user_id = state_data.get('user_id')
-            state_provider = state_data.get('provider')
-            timestamp = state_data.get('timestamp')
-            signature = state_data.get('signature')
+            user_id, state_provider, timestamp, signature = state.rsplit('.', 3)
             
             # Verify provider matches
             if state_provider != provider:
@@ -137,15 +306,11 @@ class IntegrationService:
             if datetime.now() - state_time > timedelta(minutes=5):
                 return None
             
-            # Verify signature
+            # Verify signature (constant-time comparison)
             message = f"{user_id}:{provider}:{timestamp}"
-            expected_sig = hmac.new(
-                settings.OAUTH_STATE_SECRET.encode(),
-                message.encode(),
-                hashlib.sha256
-            ).hexdigest()
+            expected_sig = self._sign_state(message)
             
-            if signature != expected_sig:
+            if not hmac.compare_digest(signature, expected_sig):
                 return None
             
             return user_id
@@ -196,9 +361,7 @@ class IntegrationService:
     
     async def connect_integration(self, user_id: str, provider: str, code: str, state: str, redirect_uri: Optional[str] = None) -> Integration:
         """Connect integration service (OAuth callback handler)"""
-        print(f"🔄 Starting integration connection: provider={provider}, user_id={user_id[:8]}...")
-        print(f"   - Received redirect_uri parameter: {redirect_uri}")
-        print(f"   - Default redirect_uri: {settings.GOOGLE_REDIRECT_URI if provider == 'google-drive' else settings.NOTION_REDIRECT_URI}")
+        logger.debug("Starting integration connection: provider=%s, user_id=%s, redirect_uri=%s", provider, user_id, redirect_uri)
         
         # Verify state
         verified_user_id = self._verify_oauth_state(state, provider)
@@ -208,21 +371,18 @@ class IntegrationService:
         # Exchange code for token
         try:
             if provider == 'google-drive':
-                token_data = self._exchange_google_code(code, redirect_uri)
+                token_data = await self._exchange_google_code(code, redirect_uri)
             elif provider == 'notion':
-                token_data = self._exchange_notion_code(code, redirect_uri)
+                token_data = await self._exchange_notion_code(code, redirect_uri)
             else:
                 raise ValueError(f"Unsupported provider: {provider}")
         except ValueError as e:
             error_msg = str(e)
-            print(f"❌ Token exchange failed: {error_msg}")
+            logger.error("Token exchange failed: %s", error_msg)
             # If invalid_grant, provide more detailed hints
             if "invalid_grant" in error_msg:
-                print(f"💡 Common causes of invalid_grant:")
-                print(f"   1. redirect_uri mismatch (during authorization vs token exchange)")
-                print(f"   2. Authorization code expired (usually valid for a few minutes)")
-                print(f"   3. Authorization code reused (each code can only be used once)")
-                print(f"   4. Please re-authorize to get a new code")
+                logger.info("invalid_grant is usually caused by a redirect_uri mismatch between authorization and token exchange, "
+                            "an expired authorization code, or a reused code; re-authorize to get a new code")
             raise
         
         # Get account info
@@ -230,7 +390,7 @@ class IntegrationService:
         
         # Determine account identifier (prefer email, otherwise use name)
         account_identifier = account_info.get('email') or account_info.get('name')
-        print(f"📝 Saving integration info, account identifier: {account_identifier}")
+        logger.debug("Saving integration info, account identifier: %s", account_identifier)
         
         # Store or update integration info
         integration = await self._save_integration(
@@ -242,11 +402,11 @@ class IntegrationService:
             account=account_identifier
         )
         
-        print(f"✅ Integration info saved, account field: {integration.account}")
+        logger.debug("Integration info saved, account field: %s", integration.account)
         
         return integration
     
-    def _exchange_google_code(self, code: str, redirect_uri: Optional[str] = None) -> Dict[str, Any]:
+    async def _exchange_google_code(self, code: str, redirect_uri: Optional[str] = None) -> Dict[str, Any]:
         """Exchange Google OAuth code for token"""
         if not settings.GOOGLE_CLIENT_SECRET:
             raise ValueError("Google OAuth not configured")
@@ -254,32 +414,25 @@ class IntegrationService:
         token_url = "https://oauth2.googleapis.com/token"
         redirect = redirect_uri or settings.GOOGLE_REDIRECT_URI
         
-        print(f"🔄 Google token exchange:")
-        print(f"   - Using redirect_uri: {redirect}")
-        print(f"   - Passed redirect_uri parameter: {redirect_uri}")
-        print(f"   - Default redirect_uri: {settings.GOOGLE_REDIRECT_URI}")
+        logger.debug("Google token exchange using redirect_uri=%s (passed: %s, default: %s)", redirect, redirect_uri, settings.GOOGLE_REDIRECT_URI)
         
         data = {
-            'client_id': settings.GOOGLE_CLIENT_ID,
-            'client_secret': settings.GOOGLE_CLIENT_SECRET,
+            **self._google_token_base,
             'code': code,
             'grant_type': 'authorization_code',
             'redirect_uri': redirect
         }
         
-        response = requests.post(token_url, data=data)
+        response = await self._http.post(token_url, data=data)
         if response.status_code != 200:
             error_text = response.text
-            print(f"❌ Google token exchange failed:")
-            print(f"   Status code: {response.status_code}")
-            print(f"   Error details: {error_text}")
-            print(f"   Used redirect_uri: {redirect}")
+            logger.error("Google token exchange failed: status=%s, redirect_uri=%s, details=%s", response.status_code, redirect, error_text)
             raise ValueError(f"Google token exchange failed: {error_text}")
         
-        print(f"✅ Google token exchange successful")
+        logger.debug("Google token exchange successful")
         return response.json()
     
-    def _exchange_notion_code(self, code: str, redirect_uri: Optional[str] = None) -> Dict[str, Any]:
+    async def _exchange_notion_code(self, code: str, redirect_uri: Optional[str] = None) -> Dict[str, Any]:
         """Exchange Notion OAuth code for token"""
         if not settings.NOTION_CLIENT_SECRET:
             raise ValueError("Notion OAuth not configured")
@@ -291,12 +444,7 @@ class IntegrationService:
             'code': code,
             'redirect_uri': redirect
         }
-        headers = {
-            'Authorization': f'Basic {base64.b64encode(f"{settings.NOTION_CLIENT_ID}:{settings.NOTION_CLIENT_SECRET}".encode()).decode()}',
-            'Content-Type': 'application/json'
-        }
-        
-        response = requests.post(token_url, json=data, headers=headers)
+        response = await self._http.post(token_url, json=data, headers=self._notion_token_headers)
         if response.status_code != 200:
             error_detail = response.text
             try:
@@ -304,56 +452,61 @@ class IntegrationService:
                 error_detail = error_json.get('error_description', error_json.get('error', error_detail))
             except:
                 pass
-            print(f"❌ Notion token exchange failed: {response.status_code} - {error_detail}")
+            logger.error("Notion token exchange failed: %s - %s", response.status_code, error_detail)
             raise ValueError(f"Notion token exchange failed: {error_detail}")
         
         return response.json()
     
     async def _get_account_info(self, provider: str, access_token: str) -> Dict[str, Any]:
         """Get account information"""
-        print(f"🔍 Getting account info: provider={provider}")
+        logger.debug("Getting account info: provider=%s", provider)
         
         if provider == 'google-drive':
             try:
-                response = requests.get(
+                response = await self._http.get(
                     'https://www.googleapis.com/oauth2/v2/userinfo',
                     headers={'Authorization': f'Bearer {access_token}'}
                 )
-                print(f"   Google userinfo response status: {response.status_code}")
+                logger.debug("Google userinfo response status: %s", response.status_code)
                 
                 if response.status_code == 200:
                     data = response.json()
                     email = data.get('email')
                     name = data.get('name')
-                    print(f"   ✅ Got account info: email={email}, name={name}")
+                    logger.debug("Got account info: email=%s, name=%s", email, name)
                     return {'email': email, 'name': name}
                 else:
-                    print(f"   ⚠️  Google userinfo request failed: {response.status_code} - {response.text}")
+                    logger.warning("Google userinfo request failed: %s - %s", response.status_code, response.text)
             except Exception as e:
-                print(f"   ❌ Exception getting Google account info: {e}")
+                logger.warning("Exception getting Google account info: %s", e)
         
         elif provider == 'notion':
             try:
-                response = requests.get(
-                    'https://api.notion.com/v1/users/me',
-                    headers={'Authorization': f'Bearer {access_token}', 'Notion-Version': '2022-06-28'}
+                response = await self._notion.get(
+                    '/users/me',
+                    headers={'Authorization': f'Bearer {access_token}'}
                 )
-                print(f"   Notion users/me response status: {response.status_code}")
+                logger.debug("Notion users/me response status: %s", response.status_code)
                 
                 if response.status_code == 200:
                     data = response.json()
                     email = data.get('person', {}).get('email')
                     name = data.get('name')
-                    print(f"   ✅ Got account info: email={email}, name={name}")
+                    logger.debug("Got account info: email=%s, name=%s", email, name)
                     return {'email': email, 'name': name}
                 else:
-                    print(f"   ⚠️  Notion users/me request failed: {response.status_code} - {response.text}")
+                    logger.warning("Notion users/me request failed: %s - %s", response.status_code, response.text)
             except Exception as e:
-                print(f"   ❌ Exception getting Notion account info: {e}")
+                logger.warning("Exception getting Notion account info: %s", e)
         
-        print(f"   ⚠️  Did not get account info, returning empty dict")
+        logger.debug("Did not get account info, returning empty dict")
         return {}
     
+    @staticmethod
+    def _integration_id(user_id: str, provider: str) -> str:
+        """Deterministic integration id, one item per (user_id, provider)"""
+        return hashlib.sha1(f"{user_id}:{provider}".encode()).hexdigest()
+    
     async def _save_integration(
         self, 
         user_id: str, 
@@ -363,132 +516,199 @@ class IntegrationService:
         expires_in: Optional[int] = None,
         account: Optional[str] = None
     ) -> Integration:
-        """Save or update integration info"""
-        table = self.dynamodb.Table(self.table_name)
-        
-        # Check if already exists
-        existing = await self.get_integration_by_user_provider(user_id, provider)
+        """Save or update integration info (single upsert, no pre-read)"""
+        table = await self._get_table()
+        integration_id = self._integration_id(user_id, provider)
         
         now = datetime.now()
+        now_iso = now.isoformat()
         expires_at = None
         if expires_in:
             expires_at = now + timedelta(seconds=expires_in)
         
-        if existing:
-            # Update existing integration
-            item = {
-                'id': existing.id,
-                'user_id': user_id,
-                'provider': provider,
-                'account': account or existing.account,
-                'connected': True,
-                'access_token': self._encrypt_token(access_token),
-                'refresh_token': self._encrypt_token(refresh_token) if refresh_token else existing.refresh_token or "",
-                'token_expires_at': expires_at.isoformat() if expires_at else None,
-                'updated_at': now.isoformat(),
-                'created_at': existing.created_at.isoformat()
-            }
-            table.put_item(Item=item)
-            # Create Integration object for return (use original tokens, not encrypted)
-            return Integration(
-                id=existing.id,
-                user_id=user_id,
-                provider=provider,
-                account=account or existing.account,
-                connected=True,
-                access_token=access_token,  # Original token
-                refresh_token=refresh_token,  # Original token
-                token_expires_at=expires_at,
-                created_at=existing.created_at,
-                updated_at=now
-            )
-        else:
-            # Create new integration
-            integration_id = str(uuid.uuid4())
-            item = {
-                'id': integration_id,
-                'user_id': user_id,
-                'provider': provider,
-                'account': account,
-                'connected': True,
-                'access_token': self._encrypt_token(access_token),
-                'refresh_token': self._encrypt_token(refresh_token) if refresh_token else "",
-                'token_expires_at': expires_at.isoformat() if expires_at else None,
-                'created_at': now.isoformat(),
-                'updated_at': now.isoformat()
+        # Keep the existing account/refresh token when the provider doesn't return new ones
+        update_parts = [
+            'user_id = :uid',
+            'provider = :p',
+            'connected = :c',
+            'access_token = :a',
+            'token_expires_at = :e',
+            'updated_at = :now',
+            'created_at = if_not_exists(created_at, :now)',
+            'account = :acc' if account else 'account = if_not_exists(account, :acc)',
+            'refresh_token = :r' if refresh_token else 'refresh_token = if_not_exists(refresh_token, :r)'
+        ]
+        response = await table.update_item(
+            Key={'id': integration_id},
+            UpdateExpression='SET ' + ', '.join(update_parts),
+            ExpressionAttributeValues={
+                ':uid': user_id,
+                ':p': provider,
+                ':c': True,
+                ':a': self._encrypt_token(access_token),
+                ':e': expires_at.isoformat() if expires_at else None,
+                ':now': now_iso,
+                ':acc': account,
+                ':r': self._encrypt_token(refresh_token)
+            },
+            ReturnValues='UPDATED_OLD'
+        )
+        old = response.get('Attributes', {})
+        self._invalidate_integration(user_id, provider)
+        
+        if not old:
+            # First save under the deterministic id: drop items stored under legacy random ids
+            await self._delete_legacy_integrations(user_id, provider, integration_id)
+        
+        # Create Integration object for return (use original tokens, not encrypted)
+        return Integration(
+            id=integration_id,
+            user_id=user_id,
+            provider=provider,
+            account=account or old.get('account'),
+            connected=True,
+            access_token=access_token,  # Original token
+            refresh_token=refresh_token,  # Original token
+            token_expires_at=expires_at,
+            created_at=old.get('created_at') or now,
+            updated_at=now
+        )
+    
+    async def _query_user_provider_items(self, user_id: str, provider: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Query raw integration items for a user/provider through the GSI"""
+        table = await self._get_table()
+        query_kwargs = {
+            'IndexName': 'user_provider_index',
+            'KeyConditionExpression': 'user_id = :uid AND provider = :p',
+            'ExpressionAttributeValues': {
+                ':uid': user_id,
+                ':p': provider
             }
-            table.put_item(Item=item)
-            # Create Integration object for return (use original tokens, not encrypted)
-            return Integration(
-                id=integration_id,
-                user_id=user_id,
-                provider=provider,
-                account=account,
-                connected=True,
-                access_token=access_token,  # Original token
-                refresh_token=refresh_token,  # Original token
-                token_expires_at=expires_at,
-                created_at=now,
-                updated_at=now
-            )
+        }
+        if limit:
+            query_kwargs['Limit'] = limit
+        response = await table.query(**query_kwargs)
+        return response['Items']
+    
+    async def _delete_legacy_integrations(self, user_id: str, provider: str, keep_id: str):
+        """Delete items for user/provider stored under ids other than `keep_id`"""
+        try:
+            table = await self._get_table()
+            for item in await self._query_user_provider_items(user_id, provider):
+                if item['id'] != keep_id:
+                    await table.delete_item(Key={'id': item['id']})
+        except ClientError as e:
+            logger.warning("Error cleaning up legacy integrations: %s", e)
     
     async def get_integration_by_user_provider(self, user_id: str, provider: str) -> Optional[Integration]:
-        """Get integration by user_id and provider"""
-        table = self.dynamodb.Table(self.table_name)
+        """Get integration by user_id and provider (cached for INTEGRATION_CACHE_TTL seconds)"""
+        key = (user_id, provider)
+        cached = self._integration_cache.get(key)
+        if cached is not None:
+            return cached.model_copy()
+        
+        lock = self._integration_locks.get(key)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._integration_locks[key] = lock
+        
+        async with lock:
+            # Another coroutine may have filled the cache while we waited
+            cached = self._integration_cache.get(key)
+            if cached is not None:
+                return cached.model_copy()
+            
+            integration = await self._fetch_integration(user_id, provider)
+            if integration is not None:
+                self._integration_cache[key] = integration
+                return integration.model_copy()
+            return None
+    
+    def _invalidate_integration(self, user_id: str, provider: str):
+        """Drop a cached integration after it is written"""
+        self._integration_cache.pop((user_id, provider), None)
+    
+    async def _fetch_integration(self, user_id: str, provider: str) -> Optional[Integration]:
+        """Load integration for user_id/provider from DynamoDB"""
+        table = await self._get_table()
         
         try:
-            response = table.query(
-                IndexName='user_provider_index',
-                KeyConditionExpression='user_id = :uid AND provider = :p',
-                ExpressionAttributeValues={
-                    ':uid': user_id,
-                    ':p': provider
-                }
-            )
+            # Direct key lookup on the deterministic id
+            response = await table.get_item(Key={'id': self._integration_id(user_id, provider)})
+            item = response.get('Item')
+            
+            if item is None:
+                # Items saved before deterministic ids: fall back to the GSI
+                # (a user has at most one integration per provider, so stop at the first match)
+                items = await self._query_user_provider_items(user_id, provider, limit=1)
+                item = items[0] if items else None
             
-            if response['Items']:
-                item = response['Items'][0]
+            if item:
                 # Decrypt tokens
-                item['access_token'] = self._decrypt_token(item.get('access_token', ''))
-                item['refresh_token'] = self._decrypt_token(item.get('refresh_token', ''))
+                self._decrypt_items([item])
                 return Integration(**item)
             return None
         except ClientError as e:
-            print(f"Error getting integration: {e}")
+            logger.error("Error getting integration: %s", e)
             return None
     
-    async def get_user_integrations(self, user_id: str) -> List[Integration]:
-        """Get all user integrations"""
-        table = self.dynamodb.Table(self.table_name)
+    async def get_user_integrations(self, user_id: str, fields: Optional[List[str]] = None) -> List[Integration]:
+        """
+        Get all user integrations
+        
+        Args:
+            user_id: User ID
+            fields: Attributes to fetch (DynamoDB projection); all attributes if None
+        """
+        table = await self._get_table()
         
         try:
-            response = table.query(
-                IndexName='user_provider_index',
-                KeyConditionExpression='user_id = :uid',
-                ExpressionAttributeValues={':uid': user_id}
-            )
+            query_kwargs = {
+                'IndexName': 'user_provider_index',
+                'KeyConditionExpression': 'user_id = :uid',
+                'ExpressionAttributeValues': {':uid': user_id}
+            }
+            if fields:
+                # Placeholders avoid clashes with DynamoDB reserved words
+                query_kwargs['ProjectionExpression'] = ','.join(f'#f{i}' for i in range(len(fields)))
+                query_kwargs['ExpressionAttributeNames'] = {f'#f{i}': name for i, name in enumerate(fields)}
             
-            integrations = []
-            for item in response['Items']:
-                # Decrypt tokens (for internal use only)
-                item['access_token'] = self._decrypt_token(item.get('access_token', ''))
-                item['refresh_token'] = self._decrypt_token(item.get('refresh_token', ''))
-                integrations.append(Integration(**item))
+            items = []
+            while True:
+                response = await table.query(**query_kwargs)
+                items.extend(response['Items'])
+                
+                # Follow LastEvaluatedKey so results above 1 MB are not truncated
+                if 'LastEvaluatedKey' not in response:
+                    break
+                query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
             
-            return integrations
+            # Decrypt tokens (for internal use only) in one pass after all pages are in
+            self._decrypt_items(items)
+            return [Integration(**item) for item in items]
         except ClientError as e:
-            print(f"Error getting user integrations: {e}")
+            logger.error("Error getting user integrations: %s", e)
             return []
     
+    async def list_user_integrations_summary(self, user_id: str) -> List[Integration]:
+        """Get all user integrations without token fields (for listing)"""
+        return await self.get_user_integrations(user_id, fields=INTEGRATION_SUMMARY_FIELDS)
+    
     async def disconnect_integration(self, user_id: str, provider: str) -> bool:
         """Disconnect integration"""
-        integration = await self.get_integration_by_user_provider(user_id, provider)
-        if not integration:
-            return False
+        table = await self._get_table()
         
-        table = self.dynamodb.Table(self.table_name)
-        table.delete_item(Key={'id': integration.id})
-        return True
+        integration_id = self._integration_id(user_id, provider)
+        response = await table.delete_item(Key={'id': integration_id}, ReturnValues='ALL_OLD')
+        self._invalidate_integration(user_id, provider)
+        deleted = 'Attributes' in response
+        
+        # Also remove items stored under legacy random ids
+        for item in await self._query_user_provider_items(user_id, provider):
+            if item['id'] != integration_id:
+                await table.delete_item(Key={'id': item['id']})
+                deleted = True
+        return deleted
     
     async def sync_integration(self, user_id: str, provider: str) -> Dict[str, Any]:
         """Sync integration data"""
@@ -516,262 +736,323 @@ class IntegrationService:
         
         # Execute sync logic (based on provider)
         synced_items = 0
+        update_expression = 'SET last_sync = :now, updated_at = :now'
+        expression_values = {}
         if provider == 'google-drive':
-            synced_items = await self._sync_google_drive(user_id, access_token)
+            stored_state = await self._load_drive_file_state(integration.id)
+            # State kept on the integration item by older versions is migrated to the state table
+            file_state = {**(integration.drive_file_state or {}), **stored_state}
+            synced_items = await self._sync_google_drive(user_id, access_token, file_state)
+            if await self._save_drive_file_state(integration.id, file_state, stored_state):
+                update_expression += ' REMOVE drive_file_state'
         elif provider == 'notion':
             synced_items = await self._sync_notion(user_id, access_token)
         
-        # Update last_sync
-        table = self.dynamodb.Table(self.table_name)
-        table.update_item(
+        # Update last_sync (one timestamp for the stored and returned values)
+        now = datetime.now()
+        now_iso = now.isoformat()
+        expression_values[':now'] = now_iso
+        table = await self._get_table()
+        await table.update_item(
             Key={'id': integration.id},
-            UpdateExpression='SET last_sync = :sync, updated_at = :now',
-            ExpressionAttributeValues={
-                ':sync': datetime.now().isoformat(),
-                ':now': datetime.now().isoformat()
-            }
+            UpdateExpression=update_expression,
+            ExpressionAttributeValues=expression_values
         )
+        self._invalidate_integration(user_id, provider)
         
         return {
             'success': True,
             'message': f'Successfully synced {synced_items} items from {provider}',
             'synced_items': synced_items,
-            'last_sync': datetime.now()
+            'last_sync': now
         }
     
+    async def _load_drive_file_state(self, integration_id: str) -> Dict[str, Dict[str, str]]:
+        """Load file_id -> {'modified_time', 'etag'} for an integration (empty on error, forcing a full sync)"""
+        file_state = {}
+        try:
+            table = await self._get_file_state_table()
+            query_kwargs = {
+                'KeyConditionExpression': 'integration_id = :iid',
+                'ExpressionAttributeValues': {':iid': integration_id},
+                'ProjectionExpression': 'file_id, modified_time, etag'
+            }
+            while True:
+                response = await table.query(**query_kwargs)
+                for item in response['Items']:
+                    file_id = item.pop('file_id')
+                    file_state[file_id] = item
+                
+                if 'LastEvaluatedKey' not in response:
+                    break
+                query_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+        except ClientError as e:
+            logger.warning("Error loading drive file state: %s", e)
+        return file_state
+    
+    async def _save_drive_file_state(
+        self,
+        integration_id: str,
+        file_state: Dict[str, Dict[str, str]],
+        stored_state: Dict[str, Dict[str, str]]
+    ) -> bool:
+        """Write the file state entries that differ from what is already stored (False on error)"""
+        changed = {file_id: state for file_id, state in file_state.items() if stored_state.get(file_id) != state}
+        if not changed:
+            return True
+        try:
+            table = await self._get_file_state_table()
+            async with table.batch_writer(overwrite_by_pkeys=['integration_id', 'file_id']) as writer:
+                for file_id, state in changed.items():
+                    await writer.put_item(Item={'integration_id': integration_id, 'file_id': file_id, **state})
+        except ClientError as e:
+            logger.warning("Error saving drive file state: %s", e)
+            return False
+        return True
+    
     async def _refresh_token(self, provider: str, refresh_token: str) -> str:
         """Refresh access token"""
         if provider == 'google-drive':
             token_url = "https://oauth2.googleapis.com/token"
             data = {
-                'client_id': settings.GOOGLE_CLIENT_ID,
-                'client_secret': settings.GOOGLE_CLIENT_SECRET,
+                **self._google_token_base,
                 'refresh_token': refresh_token,
                 'grant_type': 'refresh_token'
             }
-            response = requests.post(token_url, data=data)
+            response = await self._http.post(token_url, data=data)
             if response.status_code == 200:
                 return response.json()['access_token']
         # Notion typically doesn't need refresh token
         raise ValueError(f"Token refresh not supported for {provider}")
     
-    async def _sync_google_drive(self, user_id: str, access_token: str) -> int:
-        """Sync Google Drive files"""
+    async def _sync_google_drive(self, user_id: str, access_token: str, file_state: Dict[str, Dict[str, str]]) -> int:
+        """
+        Sync Google Drive files
+        
+        Args:
+            user_id: User ID
+            access_token: Google OAuth access token
+            file_state: file_id -> {'modified_time', 'etag'} from the previous sync, updated in place
+        """
         try:
-            from services.parser_service import parser_service
-            from services.database_service import database_service
-            from services.embedding_service import embedding_service
-            from services.s3_service import s3_service
-            from fastapi import UploadFile
-            import io
-            
             headers = {
                 'Authorization': f'Bearer {access_token}',
                 'Accept': 'application/json'
             }
             
-            synced_count = 0
-            
-            # Supported MIME types
-            supported_mime_types = {
-                'application/pdf': 'pdf',
-                'application/vnd.google-apps.document': 'docx',  # Google Docs
-                'application/vnd.openxmlformats-officedocument.wordprocessingml.document': 'docx',
-                'application/vnd.openxmlformats-officedocument.presentationml.presentation': 'pptx',  # PowerPoint
-                'application/vnd.ms-powerpoint.presentation.macroEnabled.12': 'pptx',  # PowerPoint (macro-enabled)
-                'application/vnd.google-apps.presentation': 'pptx',  # Google Slides
-                'text/plain': 'txt',
-                'text/markdown': 'md',
-                'image/png': 'png',
-                'image/jpeg': 'jpg',
-                'image/jpg': 'jpg',
-                'image/gif': 'gif'
-            }
-            
             # 1. Get Google Drive file list
             files_url = "https://www.googleapis.com/drive/v3/files"
             
-            # Build query: only get supported file types, exclude folders and deleted files
-            # Note: Google Apps types (like Google Slides) need special handling
-            mime_type_filters = [
-                f"mimeType='{mime}'" for mime in supported_mime_types.keys()
-            ]
-            query = f"({' or '.join(mime_type_filters)}) and trashed=false"
-            
+            # One list call returns metadata for up to 1000 files, projected to the fields we use
             params = {
-                'q': query,
-                'fields': 'files(id,name,mimeType,size,modifiedTime,webViewLink)',
-                'pageSize': 100
+                'q': self._DRIVE_MIME_QUERY,
+                'fields': 'nextPageToken,files(id,name,mimeType,size,modifiedTime,webViewLink)',
+                'pageSize': 1000
             }
             
-            print(f"🔍 Searching Google Drive files...")
-            response = requests.get(files_url, headers=headers, params=params)
+            logger.debug("Searching Google Drive files...")
+            files = []
+            while True:
+                response = await self._http.get(files_url, headers=headers, params=params)
+                
+                if response.status_code != 200:
+                    logger.error("Google Drive API request failed: %s - %s", response.status_code, response.text)
+                    if not files:
+                        return 0
+                    break
+                
+                data = response.json()
+                files.extend(data.get('files', []))
+                
+                # Follow nextPageToken so large drives are not truncated
+                page_token = data.get('nextPageToken')
+                if not page_token:
+                    break
+                params['pageToken'] = page_token
+            
+            logger.debug("Found %d supported files", len(files))
             
-            if response.status_code != 200:
-                print(f"❌ Google Drive API request failed: {response.status_code} - {response.text}")
-                return 0
+            # 2. Download and process files concurrently (network-bound, bounded fan-out)
+            # All files of this run share one sync timestamp
+            sync_ts = datetime.now().isoformat()
+            sem = asyncio.Semaphore(DRIVE_SYNC_CONCURRENCY)
+            results = await asyncio.gather(
+                *[
+                    self._process_drive_file(file_info, user_id, headers, file_state, sync_ts, sem)
+                    for file_info in files
+                ],
+                return_exceptions=True
+            )
+            synced_count = sum(1 for result in results if result is True)
             
-            files = response.json().get('files', [])
-            print(f"📋 Found {len(files)} supported files")
+            logger.info("Google Drive sync complete, synced %d files", synced_count)
+            return synced_count
             
-            # 2. For each file, download and process
-            for file_info in files:
-                try:
-                    file_id = file_info.get('id')
-                    file_name = file_info.get('name', 'Untitled')
-                    mime_type = file_info.get('mimeType', '')
-                    file_size = int(file_info.get('size', 0))
-                    modified_time = file_info.get('modifiedTime', '')
-                    
-                    # Check file type
-                    file_extension = supported_mime_types.get(mime_type)
-                    if not file_extension:
-                        print(f"⚠️  Skipping unsupported file type: {file_name} ({mime_type})")
-                        continue
-                    
-                    # Check if already exists (identified by source)
-                    source_id = f"googledrive_{file_id}"
-                    
-                    print(f"📥 Processing file: {file_name} (ID: {file_id[:8]}...)")
-                    
-                    # Download file content
-                    download_url = f"https://www.googleapis.com/drive/v3/files/{file_id}"
-                    
-                    # Google Docs need to use export endpoint
-                    if mime_type == 'application/vnd.google-apps.document':
-                        download_url += '?exportFormat=docx&mimeType=application/vnd.openxmlformats-officedocument.wordprocessingml.document'
-                    elif mime_type == 'application/vnd.google-apps.presentation':
-                        # Export Google Slides as PPTX
-                        download_url += '?exportFormat=pptx&mimeType=application/vnd.openxmlformats-officedocument.presentationml.presentation'
-                    else:
-                        download_url += '?alt=media'
-                    
-                    download_response = requests.get(download_url, headers=headers, stream=True)
-                    
+        except Exception as e:
+            logger.exception("Google Drive sync failed: %s", e)
+            return 0
+    
+    async def _process_drive_file(
+        self,
+        file_info: Dict[str, Any],
+        user_id: str,
+        headers: Dict[str, str],
+        file_state: Dict[str, Dict[str, str]],
+        sync_ts: str,
+        sem: asyncio.Semaphore
+    ) -> bool:
+        """Download a single Google Drive file, upload it to S3 and parse it into memories"""
+        from services.parser_service import parser_service
+        from services.s3_service import s3_service
+        from fastapi import UploadFile
+        
+        file_name = file_info.get('name', 'Untitled')
+        async with sem:
+            spool = tempfile.SpooledTemporaryFile(max_size=DRIVE_SPOOL_MAX_MEMORY)
+            try:
+                file_id = file_info.get('id')
+                mime_type = file_info.get('mimeType', '')
+                file_size = int(file_info.get('size', 0))
+                modified_time = file_info.get('modifiedTime', '')
+                
+                # Check file type
+                file_extension = self._SUPPORTED_MIME_TYPES.get(mime_type)
+                if not file_extension:
+                    logger.debug("Skipping unsupported file type: %s (%s)", file_name, mime_type)
+                    return False
+                
+                # Skip files not modified since they were last synced
+                known = file_state.get(file_id)
+                if known and modified_time and modified_time <= known.get('modified_time', ''):
+                    logger.debug("Skipping unchanged file: %s (ID: %s)", file_name, file_id)
+                    return False
+                
+                # Check if already exists (identified by source)
+                source_id = f"googledrive_{file_id}"
+                
+                logger.debug("Processing file: %s (ID: %s)", file_name, file_id)
+                
+                # Download file content
+                download_url = f"https://www.googleapis.com/drive/v3/files/{file_id}"
+                
+                # Google Docs need to use export endpoint
+                if mime_type == 'application/vnd.google-apps.document':
+                    download_url += '?exportFormat=docx&mimeType=application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+                elif mime_type == 'application/vnd.google-apps.presentation':
+                    # Export Google Slides as PPTX
+                    download_url += '?exportFormat=pptx&mimeType=application/vnd.openxmlformats-officedocument.presentationml.presentation'
+                else:
+                    download_url += '?alt=media'
+                
+                # Stream file content in 1 MB chunks into a spooled buffer
+                # (kept in memory up to DRIVE_SPOOL_MAX_MEMORY, then rolled over to disk)
+                # Conditional GET: Drive answers 304 if the content still matches the stored ETag
+                request_headers = headers
+                if known and known.get('etag'):
+                    request_headers = {**headers, 'If-None-Match': known['etag']}
+                
+                async with self._http.stream('GET', download_url, headers=request_headers) as download_response:
+                    if download_response.status_code == 304:
+                        logger.debug("Content unchanged (304): %s", file_name)
+                        file_state[file_id] = {**known, 'modified_time': modified_time}
+                        return False
                     if download_response.status_code != 200:
-                        print(f"⚠️  Download failed: {file_name} (status: {download_response.status_code})")
-                        continue
-                    
-                    # Read file content
-                    file_content = download_response.content
-                    
-                    # Create UploadFile object for subsequent use
-                    file_obj = io.BytesIO(file_content)
+                        logger.warning("Download failed: %s (status: %s)", file_name, download_response.status_code)
+                        return False
                     
-                    # First upload to S3 (following Notion implementation)
-                    try:
-                        upload_file_for_s3 = UploadFile(
-                            filename=f"{file_name}.{file_extension}",
-                            file=file_obj
-                        )
-                        upload_file_for_s3.content_type = mime_type
-                        s3_data = await s3_service.upload_file(upload_file_for_s3)
-                        print(f"📤 File uploaded to S3: {s3_data['s3_key']}")
-                    except Exception as s3_error:
-                        print(f"⚠️  S3 upload failed, but continuing with parsing: {s3_error}")
-                        s3_data = None
-                    
-                    # Reset file pointer, create new UploadFile for parsing
-                    file_obj = io.BytesIO(file_content)
-                    upload_file = UploadFile(
+                    async for chunk in download_response.aiter_bytes(DRIVE_DOWNLOAD_CHUNK_SIZE):
+                        spool.write(chunk)
+                    etag = download_response.headers.get('etag')
+                
+                # First upload to S3 (following Notion implementation)
+                try:
+                    spool.seek(0)
+                    upload_file_for_s3 = UploadFile(
                         filename=f"{file_name}.{file_extension}",
-                        file=file_obj
+                        file=spool
                     )
-                    upload_file.content_type = mime_type
-                    
-                    # Add Google Drive specific info to s3_data metadata
-                    # parser_service will merge s3_data.metadata into memory metadata
-                    if s3_data:
-                        if 'metadata' not in s3_data:
-                            s3_data['metadata'] = {}
-                        s3_data['metadata'].update({
-                            'source': 'google-drive',
-                            'google_drive_file_id': file_id,
-                            'google_drive_file_name': file_name,
-                            'google_drive_file_url': file_info.get('webViewLink', ''),
-                            'modified_time': modified_time,
-                            'synced_at': datetime.now().isoformat()
-                        })
-                    else:
-                        # If no s3_data, create a dict containing metadata
-                        s3_data = {
-                            'metadata': {
-                                'source': 'google-drive',
-                                'google_drive_file_id': file_id,
-                                'google_drive_file_name': file_name,
-                                'google_drive_file_url': file_info.get('webViewLink', ''),
-                                'modified_time': modified_time,
-                                'synced_at': datetime.now().isoformat()
-                            }
-                        }
+                    upload_file_for_s3.content_type = mime_type
+                    s3_data = await s3_service.upload_file(upload_file_for_s3)
+                    logger.debug("File uploaded to S3: %s", s3_data['s3_key'])
+                except Exception as s3_error:
+                    logger.warning("S3 upload failed, but continuing with parsing: %s", s3_error)
+                    s3_data = None
+                
+                # Reset file pointer, reuse the same buffer for parsing
+                spool.seek(0)
+                upload_file = UploadFile(
+                    filename=f"{file_name}.{file_extension}",
+                    file=spool
+                )
+                upload_file.content_type = mime_type
+                
+                # Add Google Drive specific info to s3_data metadata (an empty s3_data if the upload failed)
+                # parser_service will merge s3_data.metadata into memory metadata
+                s3_data = s3_data or {}
+                s3_data['metadata'] = {
+                    **s3_data.get('metadata', {}),
+                    **_DRIVE_BASE_METADATA,
+                    'google_drive_file_id': file_id,
+                    'google_drive_file_name': file_name,
+                    'google_drive_file_url': file_info.get('webViewLink', ''),
+                    'modified_time': modified_time,
+                    'synced_at': sync_ts
+                }
+                
+                # Parse file content (parser_service.parse_file automatically creates memory)
+                try:
+                    parse_result = await parser_service.parse_file(upload_file, s3_data, user_id)
                     
-                    # Parse file content (parser_service.parse_file automatically creates memory)
-                    try:
-                        parse_result = await parser_service.parse_file(upload_file, s3_data or {}, user_id)
+                    # parse_result already contains memory_id, meaning memory was created
+                    if parse_result.get('memory_id'):
+                        # Update memory metadata to add Google Drive specific info
+                        # Note: parser_service already created the memory
+                        # To include Google Drive info, we need to update metadata
+                        # But for simplicity, we can deduplicate on next sync, or update metadata now
+                        
+                        # Get created memory_id
+                        memory_id = parse_result.get('memory_id')
+                        
+                        # Update memory metadata to add Google Drive info (optional)
+                        # Since parser_service already created memory, metadata should already contain basic info
+                        # Google Drive info can be identified through source field
                         
-                        # parse_result already contains memory_id, meaning memory was created
-                        if parse_result.get('memory_id'):
-                            # Update memory metadata to add Google Drive specific info
-                            # Note: parser_service already created the memory
-                            # To include Google Drive info, we need to update metadata
-                            # But for simplicity, we can deduplicate on next sync, or update metadata now
-                            
-                            # Get created memory_id
-                            memory_id = parse_result.get('memory_id')
-                            
-                            # Update memory metadata to add Google Drive info (optional)
-                            # Since parser_service already created memory, metadata should already contain basic info
-                            # Google Drive info can be identified through source field
-                            
-                            synced_count += 1
-                            if s3_data:
-                                print(f"✅ Synced Google Drive file: {file_name} (ID: {memory_id}, S3: {s3_data['s3_key']})")
-                            else:
-                                print(f"✅ Synced Google Drive file: {file_name} (ID: {memory_id})")
+                        if parse_result.get('failed_chunks'):
+                            logger.warning("Google Drive file %s: %d chunk(s) could not be stored", file_name, parse_result['failed_chunks'])
+                        
+                        if s3_data.get('s3_key'):
+                            logger.debug("Synced Google Drive file: %s (ID: %s, S3: %s)", file_name, memory_id, s3_data['s3_key'])
                         else:
-                            print(f"⚠️  File parsed successfully but no memory created: {file_name}")
+                            logger.debug("Synced Google Drive file: %s (ID: %s)", file_name, memory_id)
+                        
+                        # Remember what was synced so unchanged files are skipped next time
+                        synced_state = {'modified_time': modified_time}
+                        if etag:
+                            synced_state['etag'] = etag
+                        file_state[file_id] = synced_state
+                        return True
                     
-                    except Exception as parse_error:
-                        print(f"⚠️  File parsing failed: {file_name} - {parse_error}")
-                        import traceback
-                        traceback.print_exc()
-                        continue
+                    logger.warning("File parsed successfully but no memory created: %s", file_name)
+                    return False
                 
-                except Exception as e:
-                    print(f"⚠️  File processing failed: {file_name} - {e}")
-                    import traceback
-                    traceback.print_exc()
-                    continue
+                except Exception as parse_error:
+                    logger.exception("File parsing failed: %s - %s", file_name, parse_error)
+                    return False
             
-            print(f"✅ Google Drive sync complete, synced {synced_count} files")
-            return synced_count
-            
-        except Exception as e:
-            print(f"❌ Google Drive sync failed: {e}")
-            import traceback
-            traceback.print_exc()
-            return 0
+            except Exception as e:
+                logger.exception("File processing failed: %s - %s", file_name, e)
+                return False
+            finally:
+                spool.close()
     
     async def _sync_notion(self, user_id: str, access_token: str) -> int:
         """Sync Notion pages"""
         try:
-            from services.parser_service import parser_service
-            from services.database_service import database_service
-            from services.embedding_service import embedding_service
-            from services.s3_service import s3_service
-            
             # Get Notion databases and pages
-            # First search all accessible pages
-            headers = {
-                'Authorization': f'Bearer {access_token}',
-                'Notion-Version': '2022-06-28',
-                'Content-Type': 'application/json'
-            }
-            
-            synced_count = 0
+            # First search all accessible pages (Notion-Version is set on the client)
+            headers = {'Authorization': f'Bearer {access_token}'}
             
             # 1. Search all accessible pages
-            search_url = "https://api.notion.com/v1/search"
             search_data = {
                 "filter": {
                     "property": "object",
@@ -780,211 +1061,225 @@ class IntegrationService:
                 "page_size": 100
             }
             
-            response = requests.post(search_url, json=search_data, headers=headers)
+            response = await self._notion.post('/search', json=search_data, headers=headers)
             if response.status_code != 200:
-                print(f"❌ Notion search failed: {response.status_code} - {response.text}")
+                logger.error("Notion search failed: %s - %s", response.status_code, response.text)
                 return 0
             
             results = response.json().get('results', [])
             
-            # 2. For each page, get its content and save as memory
-            for page in results:
+            # 2. Pipeline: fetch/upload -> embed -> write. Pages flow to the next stage as soon as
+            # they are ready, so embedding and DynamoDB writes overlap with the remaining fetches
+            # All pages of this run share one sync timestamp
+            sync_ts = datetime.now().isoformat()
+            sem = asyncio.Semaphore(NOTION_SYNC_CONCURRENCY)
+            embed_queue = asyncio.Queue()
+            write_queue = asyncio.Queue()
+            
+            async def fetch_page(page: Dict[str, Any]):
+                memory = await self._process_notion_page(page, user_id, headers, sync_ts, sem)
+                if memory:
+                    await embed_queue.put(memory)
+            
+            async def fetch_all():
                 try:
-                    page_id = page.get('id')
-                    page_title = self._extract_page_title(page)
-                    
-                    # Get page block content
-                    blocks_url = f"https://api.notion.com/v1/blocks/{page_id}/children"
-                    blocks_response = requests.get(blocks_url, headers=headers)
-                    
-                    if blocks_response.status_code == 200:
-                        blocks = blocks_response.json().get('results', [])
-                        page_content = self._extract_text_from_blocks(blocks)
-                        
-                        if page_content:
-                            # Build complete page content
-                            full_content = f"Title: {page_title}\n\nContent:\n{page_content}"
-                            
-                            # Check if already exists (identified by source)
-                            source_id = f"notion_{page_id}"
-                            
-                            # First upload document content to S3
-                            try:
-                                s3_data = s3_service.upload_text_content(
-                                    text_content=full_content,
-                                    filename=f"notion_{page_title}",
-                                    user_id=user_id,
-                                    metadata={
-                                        'notion_page_id': page_id,
-                                        'notion_page_url': page.get('url', ''),
-                                        'notion_page_title': page_title,
-                                        'source': 'notion'
-                                    }
-                                )
-                                print(f"📤 Notion page uploaded to S3: {s3_data['s3_key']}")
-                            except Exception as s3_error:
-                                print(f"⚠️  S3 upload failed, but continuing to create memory: {s3_error}")
-                                s3_data = None
-                            
-                            # Generate embedding
-                            embedding = embedding_service.generate_embedding(
-                                text=full_content,
-                                input_type="passage"
-                            )
-                            
-                            # Prepare metadata, including S3 info
-                            memory_metadata = {
-                                'source': 'notion',
-                                'notion_page_id': page_id,
-                                'notion_page_url': page.get('url', ''),
-                                'notion_page_title': page_title,
-                                'synced_at': datetime.now().isoformat()
-                            }
-                            
-                            # If S3 upload successful, add S3 info to metadata
-                            if s3_data:
-                                memory_metadata['s3_key'] = s3_data.get('s3_key')
-                                memory_metadata['s3_url'] = s3_data.get('file_url')
-                                memory_metadata['file_size'] = s3_data.get('file_size')
-                            
-                            # Create memory, source points to S3 URL (if exists) or use source_id
-                            source_url = s3_data.get('file_url') if s3_data else source_id
-                            
-                            memory_id = database_service.create_memory(
-                                content=full_content,
-                                memory_type='text',
-                                embedding=embedding,
-                                user_id=user_id,
-                                metadata=memory_metadata,
-                                source=source_url,
-                                summary=page_content[:200] + "..." if len(page_content) > 200 else page_content,
-                                tags=['notion', 'synced']
-                            )
-                            
-                            if memory_id:
-                                synced_count += 1
-                                if s3_data:
-                                    print(f"✅ Synced Notion page: {page_title} (ID: {memory_id}, S3: {s3_data['s3_key']})")
-                                else:
-                                    print(f"✅ Synced Notion page: {page_title} (ID: {memory_id}, S3 upload failed)")
-                    
-                except Exception as e:
-                    print(f"⚠️  Page sync failed (ID: {page_id}): {e}")
-                    import traceback
-                    traceback.print_exc()
-                    continue
+                    await asyncio.gather(*[fetch_page(page) for page in results], return_exceptions=True)
+                finally:
+                    await embed_queue.put(None)
+            
+            _, _, synced_count = await asyncio.gather(
+                fetch_all(),
+                self._notion_embed_stage(user_id, embed_queue, write_queue),
+                self._notion_write_stage(write_queue)
+            )
             
-            print(f"✅ Notion sync complete, synced {synced_count} pages")
+            logger.info("Notion sync complete, synced %d pages", synced_count)
             return synced_count
             
         except Exception as e:
-            print(f"❌ Notion sync failed: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Notion sync failed: %s", e)
             return 0
     
-    def _extract_page_title(self, page: Dict[str, Any]) -> str:
-        """Extract title from Notion page object"""
-        try:
-            properties = page.get('properties', {})
-            # Look for title property
-            for prop_name, prop_value in properties.items():
-                prop_type = prop_value.get('type')
-                if prop_type == 'title':
-                    title_parts = prop_value.get('title', [])
-                    if title_parts:
-                        return ''.join([part.get('plain_text', '') for part in title_parts])
-            
-            # If no title property found, try other names
-            for prop_name in ['Name', 'name', 'Title', 'title']:
-                if prop_name in properties:
-                    prop = properties[prop_name]
-                    if prop.get('type') == 'title':
-                        title_parts = prop.get('title', [])
-                        if title_parts:
-                            return ''.join([part.get('plain_text', '') for part in title_parts])
-            
-            # Finally try to get from URL
-            url = page.get('url', '')
-            if url:
-                return url.split('/')[-1] or 'Untitled Page'
-            
-            return 'Untitled Page'
-        except Exception as e:
-            return 'Untitled Page'
-    
-    def _extract_text_from_blocks(self, blocks: List[Dict[str, Any]]) -> str:
-        """Extract text content from Notion blocks"""
-        texts = []
-        
-        for block in blocks:
-            block_type = block.get('type')
-            block_content = block.get(block_type, {})
-            
-            if block_type == 'paragraph':
-                rich_text = block_content.get('rich_text', [])
-                para_text = ''.join([rt.get('plain_text', '') for rt in rich_text])
-                if para_text:
-                    texts.append(para_text)
-            
-            elif block_type == 'heading_1':
-                rich_text = block_content.get('rich_text', [])
-                heading_text = ''.join([rt.get('plain_text', '') for rt in rich_text])
-                if heading_text:
-                    texts.append(f"# {heading_text}")
-            
-            elif block_type == 'heading_2':
-                rich_text = block_content.get('rich_text', [])
-                heading_text = ''.join([rt.get('plain_text', '') for rt in rich_text])
-                if heading_text:
-                    texts.append(f"## {heading_text}")
-            
-            elif block_type == 'heading_3':
-                rich_text = block_content.get('rich_text', [])
-                heading_text = ''.join([rt.get('plain_text', '') for rt in rich_text])
-                if heading_text:
-                    texts.append(f"### {heading_text}")
-            
-            elif block_type == 'bulleted_list_item':
-                rich_text = block_content.get('rich_text', [])
-                item_text = ''.join([rt.get('plain_text', '') for rt in rich_text])
-                if item_text:
-                    texts.append(f"• {item_text}")
-            
-            elif block_type == 'numbered_list_item':
-                rich_text = block_content.get('rich_text', [])
-                item_text = ''.join([rt.get('plain_text', '') for rt in rich_text])
-                if item_text:
-                    texts.append(f"1. {item_text}")
-            
-            elif block_type == 'to_do':
-                rich_text = block_content.get('rich_text', [])
-                item_text = ''.join([rt.get('plain_text', '') for rt in rich_text])
-                checked = block_content.get('checked', False)
-                checkbox = '✓' if checked else '☐'
-                if item_text:
-                    texts.append(f"{checkbox} {item_text}")
-            
-            elif block_type == 'quote':
-                rich_text = block_content.get('rich_text', [])
-                quote_text = ''.join([rt.get('plain_text', '') for rt in rich_text])
-                if quote_text:
-                    texts.append(f"> {quote_text}")
-            
-            elif block_type == 'code':
-                rich_text = block_content.get('rich_text', [])
-                code_text = ''.join([rt.get('plain_text', '') for rt in rich_text])
-                language = block_content.get('language', '')
-                if code_text:
-                    texts.append(f"```{language}\n{code_text}\n```")
-            
-            elif block_type == 'callout':
-                rich_text = block_content.get('rich_text', [])
-                callout_text = ''.join([rt.get('plain_text', '') for rt in rich_text])
-                if callout_text:
-                    texts.append(f"💡 {callout_text}")
-        
-        return '\n\n'.join(texts)
+    async def _notion_embed_stage(self, user_id: str, embed_queue: asyncio.Queue, write_queue: asyncio.Queue):
+        """
+        Pipeline stage: embed queued page memories in batches and pass them on for writing
+        
+        Takes whatever is queued (up to EMBEDDING_BATCH_SIZE) per round; pages with a cached
+        embedding pass straight through. A None item ends the stage and is forwarded.
+        """
+        from services.embedding_service import embedding_service
+        from services.embedding_cache import embedding_cache
+        
+        batch_size = max(1, settings.EMBEDDING_BATCH_SIZE)
+        done = False
+        while not done:
+            batch = []
+            item = await embed_queue.get()
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= batch_size or embed_queue.empty():
+                    break
+                item = embed_queue.get_nowait()
+            done = item is None
+            
+            uncached = [memory for memory in batch if 'embedding' not in memory]
+            if uncached:
+                try:
+                    embeddings = await asyncio.to_thread(
+                        embedding_service.generate_embeddings_batch,
+                        [memory['content'] for memory in uncached],
+                        "passage"
+                    )
+                except Exception as e:
+                    # Drop this round's uncached pages, they are retried on the next sync
+                    logger.exception("Embedding %d Notion pages failed: %s", len(uncached), e)
+                    batch = [memory for memory in batch if 'embedding' in memory]
+                else:
+                    for memory, embedding in zip(uncached, embeddings):
+                        memory['embedding'] = embedding
+                    
+                    def cache_embeddings():
+                        for memory in uncached:
+                            embedding_cache.set(memory['metadata']['content_hash'], embedding_service.model, memory['embedding'])
+                            embedding_cache.remember(user_id, memory['content'], memory['embedding'])
+                    await asyncio.to_thread(cache_embeddings)
+            
+            if batch:
+                await write_queue.put(batch)
+        await write_queue.put(None)
+    
+    async def _notion_write_stage(self, write_queue: asyncio.Queue) -> int:
+        """Pipeline stage: persist embedded page memories with batched writes until a None item; returns count"""
+        from services.database_service import database_service
+        
+        synced_count = 0
+        while True:
+            batch = await write_queue.get()
+            if batch is None:
+                return synced_count
+            try:
+                memory_ids = await asyncio.to_thread(database_service.create_memories, batch)
+            except Exception as e:
+                logger.exception("Writing %d Notion pages failed: %s", len(batch), e)
+                continue
+            for memory, memory_id in zip(batch, memory_ids):
+                logger.debug("Synced Notion page: %s (ID: %s)", memory['metadata']['notion_page_title'], memory_id)
+            synced_count += len(memory_ids)
+    
+    async def _process_notion_page(
+        self,
+        page: Dict[str, Any],
+        user_id: str,
+        headers: Dict[str, str],
+        sync_ts: str,
+        sem: asyncio.Semaphore
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Fetch a single Notion page and upload it to S3
+        
+        Returns:
+            The memory to create (with 'embedding' only on a cache hit), or None if the page is empty or unchanged
+        """
+        from services.database_service import database_service
+        from services.embedding_service import embedding_service
+        from services.embedding_cache import embedding_cache
+        from services.s3_service import s3_service
+        
+        page_id = page.get('id')
+        async with sem:
+            try:
+                page_title = extract_page_title(page)
+                
+                # Get page block content
+                blocks_response = await self._notion.get(f'/blocks/{page_id}/children', headers=headers)
+                
+                if blocks_response.status_code != 200:
+                    return None
+                
+                blocks = blocks_response.json().get('results', [])
+                page_content = extract_text_from_blocks(blocks)
+                if not page_content:
+                    return None
+                
+                # Build complete page content
+                full_content = f"Title: {page_title}\n\nContent:\n{page_content}"
+                
+                # Check if already exists (identified by source + content hash)
+                source_id = f"notion_{page_id}"
+                content_hash = embedding_cache.content_hash(full_content)
+                existing = await asyncio.to_thread(
+                    database_service.get_memory_by_source_hash, user_id, source_id, content_hash
+                )
+                # Memories stored with a borrowed near-duplicate embedding are re-synced to get their own
+                approximate = bool(existing and existing.get('metadata', {}).get('approximate_embedding'))
+                if existing and not approximate:
+                    logger.debug("Skipping unchanged Notion page: %s (memory %s)", page_title, existing['id'])
+                    return None
+                
+                # First upload document content to S3 (blocking boto3 call, run off the event loop)
+                try:
+                    s3_data = await asyncio.to_thread(
+                        s3_service.upload_text_content,
+                        text_content=full_content,
+                        filename=f"notion_{page_title}",
+                        user_id=user_id,
+                        metadata={
+                            'notion_page_id': page_id,
+                            'notion_page_url': page.get('url', ''),
+                            'notion_page_title': page_title,
+                            'source': 'notion'
+                        }
+                    )
+                    logger.debug("Notion page uploaded to S3: %s", s3_data['s3_key'])
+                except Exception as s3_error:
+                    logger.warning("S3 upload failed, but continuing to create memory: %s", s3_error)
+                    s3_data = None
+                
+                # Prepare metadata, including S3 info
+                memory_metadata = {
+                    'source': 'notion',
+                    'notion_page_id': page_id,
+                    'notion_page_url': page.get('url', ''),
+                    'notion_page_title': page_title,
+                    'content_hash': content_hash,
+                    'synced_at': sync_ts
+                }
+                
+                # If S3 upload successful, add S3 info to metadata
+                if s3_data:
+                    memory_metadata['s3_key'] = s3_data.get('s3_key')
+                    memory_metadata['s3_url'] = s3_data.get('file_url')
+                    memory_metadata['file_size'] = s3_data.get('file_size')
+                
+                # Create memory, source points to S3 URL (if exists) or use source_id
+                source_url = s3_data.get('file_url') if s3_data else source_id
+                
+                # Memory is queued by the caller, all pages are embedded and written together
+                memory = {
+                    'memory_id': database_service.source_memory_id(user_id, source_id, content_hash),
+                    'content': full_content,
+                    'memory_type': 'text',
+                    'user_id': user_id,
+                    'metadata': memory_metadata,
+                    'source': source_url,
+                    'summary': page_content[:200] + "..." if len(page_content) > 200 else page_content,
+                    'tags': ['notion', 'synced']
+                }
+                
+                # Reuse the stored embedding if this content (or a near-identical edit of it) was embedded before
+                # A near-duplicate's embedding is flagged as approximate and replaced on the next sync
+                cached_embedding = await asyncio.to_thread(embedding_cache.get, content_hash, embedding_service.model)
+                if cached_embedding is None and not approximate:
+                    cached_embedding = await asyncio.to_thread(embedding_cache.find_near_duplicate, user_id, full_content)
+                    if cached_embedding is not None:
+                        memory_metadata['approximate_embedding'] = True
+                if cached_embedding is not None:
+                    memory['embedding'] = cached_embedding
+                return memory
+            
+            except Exception as e:
+                logger.exception("Page sync failed (ID: %s): %s", page_id, e)
+                return None
 
 # Create service instance
 integration_service = IntegrationService()
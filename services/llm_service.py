@@ -1,9 +1,106 @@
 # LLM service
+import re
+import hashlib
+import threading
 import requests
 import json
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Iterator, Optional, Tuple
+import numpy as np
+from cachetools import TTLCache
 from openai import OpenAI
 from config import settings
+from utils.text_utils import estimate_tokens
+
+try:
+    import tiktoken
+    _TOKEN_ENCODING = tiktoken.get_encoding("cl100k_base")
+except ImportError:  # Optional: falls back to the CJK-aware estimate_tokens
+    _TOKEN_ENCODING = None
+
+# Response cache: exact (identical messages) and semantic (same prompt/history, similar question)
+LLM_CACHE_SIZE = 4096
+LLM_CACHE_TTL = 3600  # seconds
+LLM_SEMANTIC_THRESHOLD = 0.92  # Min cosine similarity between questions for a semantic hit
+LLM_SEMANTIC_ENTRIES_PER_PREFIX = 32
+
+# Token budget for conversation history included in the prompt
+HISTORY_TOKEN_BUDGET = 2000
+
+def _count_tokens(text: str) -> int:
+    """Count prompt tokens (tiktoken cl100k_base if installed, else estimate)"""
+    if _TOKEN_ENCODING is not None:
+        return len(_TOKEN_ENCODING.encode(text))
+    return estimate_tokens(text)
+
+# System prompt variants, built once at import; only the context slot varies per request
+_BASE_SYSTEM_PROMPT = """You are an intelligent personal memory assistant named UniMem AI. Your main functions are:
+
+        ##  Core Task
+        Directly use the provided memory information to answer user questions - don't ask the user back!
+
+        ## ✅ Correct Answering Approach
+        When the user asks: "What is Gregory's course about?"
+        If there is information in memory, answer directly:
+        "Gregory's course is about time series analysis, panel data, and forecasting methods! Specifically, it includes Class #3 and Class #4, covering statistical analysis and forecasting techniques for time series data."
+
+        ## ❌ Wrong Answering Approach
+        Don't say:
+        - "According to the provided information..." (too stiff)
+        - "Please tell me more about..." (don't ask back)
+        - "I need to confirm..." (don't question the memory)
+        - "Gregory's course is probably about..." (don't be vague)
+
+        ## 📋 Answering Principles
+        1. **Direct Answer**: If information is in memory, answer directly and clearly
+        2. **Confident Expression**: Use affirmative tone, don't say "maybe", "probably"
+        3. **Specific Details**: Use specific details from memory
+        4. **Natural Conversation**: Communicate like a friend, use emojis appropriately 😊
+        5. **Admit Not Knowing**: Only say you don't know when there's truly no information in memory
+
+        ## 🔑 Key Instructions
+        - Prioritize using the "Current Memory Information" provided below
+        - Memory information is fact, don't question it
+        - Don't make users repeat information that's already in memory
+
+        """
+
+_CONTEXT_SYSTEM_PROMPT = _BASE_SYSTEM_PROMPT + """
+
+    ## 📚 Current Memory Information
+    The following are relevant memories found by the system. Please use this information directly to answer the user's question:
+
+    {context}
+
+    **Important Note**: The above memory information is the factual basis you should use. Please answer the user directly and confidently using this information, don't ask the user about content that's already in memory!
+    """
+
+_NO_CONTEXT_SYSTEM_PROMPT = _BASE_SYSTEM_PROMPT + """
+
+    ## ⚠️ Notice
+    Currently no relevant memory information was found. Please politely tell the user you don't have relevant memories yet, and ask if they need information about something else.
+    """
+
+# Fallback intents in priority order: (keywords, response); keywords match as substrings
+_SIMPLE_INTENTS = [
+    # Greetings
+    (["你好", "hello", "hi", "您好"],
+     "Hello! I'm UniMem AI assistant, I can help you manage and retrieve personal memories. How can I help you?"),
+    # Questions about JavaScript
+    (["javascript", "js", "frontend", "programming", "前端", "编程"],
+     "Regarding JavaScript, I can help you search relevant technical documentation and memories. JavaScript is a widely used programming language, mainly for web development."),
+    # Questions about React
+    (["react", "framework", "component", "框架", "组件"],
+     "React is a JavaScript library for building user interfaces. It uses component-based development patterns, improving code maintainability and reusability."),
+    # Search related
+    (["搜索", "查找", "找", "search", "find"],
+     "I can help you search relevant memories and documents. Please tell me what you'd like to know, and I'll look for relevant information in your memories.")
+]
+
+# One compiled alternation per intent: a single scan of the input instead of one per keyword
+_SIMPLE_INTENT_PATTERNS = [
+    (re.compile('|'.join(map(re.escape, keywords))), response)
+    for keywords, response in _SIMPLE_INTENTS
+]
 
 class LLMService:
     """
@@ -27,11 +124,19 @@ class LLMService:
         )
         self.model = "nvidia/llama-3.1-nemotron-nano-8b-v1"  # ✅ Competition requirement
         
+        # exact: sha256(user_id, messages) -> response
+        # semantic: sha256(user_id, messages without the last user turn) -> [(unit question embedding, response)]
+        self._exact_cache = TTLCache(maxsize=LLM_CACHE_SIZE, ttl=LLM_CACHE_TTL)
+        self._semantic_cache = TTLCache(maxsize=LLM_CACHE_SIZE, ttl=LLM_CACHE_TTL)
+        self._cache_lock = threading.Lock()
+        
     def generate_response(
         self,
         user_input: str,
         context: str = "",
-        conversation_history: List[Dict[str, str]] = None
+        conversation_history: List[Dict[str, str]] = None,
+        user_id: str = None,
+        query_embedding: Optional[List[float]] = None
     ) -> str:
         """
         Generate AI response
@@ -40,103 +145,199 @@ class LLMService:
             user_input: User input
             context: Context information
             conversation_history: Conversation history
+            user_id: User ID (semantic cache hits are only shared within one user)
+            query_embedding: Query embedding of user_input, if already computed; enables the semantic cache
             
         Returns:
             str: AI response
         """
         try:
-            # Build system prompt
-            system_prompt = self._build_system_prompt(context)
-            
-            # Build messages
-            messages = [{"role": "system", "content": system_prompt}]
+            messages = self._build_messages(user_input, context, conversation_history)
             
-            # Add conversation history
-            if conversation_history:
-                for turn in conversation_history[-6:]:  # Last 6 conversation turns
-                    messages.append({"role": "user", "content": turn.get("user_input", "")})
-                    messages.append({"role": "assistant", "content": turn.get("response", "")})
+            cached, cache_keys = self._cache_lookup(messages, user_id, query_embedding)
+            if cached is not None:
+                return cached
             
-            # Add current user input
-            messages.append({"role": "user", "content": user_input})
-            
-            # Call NVIDIA NIM API
-            response = self._call_nvidia_api(messages)
+            # Call NVIDIA NIM API (only real completions are cached, never the fallback)
+            try:
+                response = self._complete(messages)
+            except Exception as e:
+                print(f"❌ NVIDIA NIM chat completions failed: {e}")
+                return self._generate_simple_response(messages)
             
+            self._cache_store(cache_keys, response)
             return response
             
         except Exception as e:
             print(f"❌ LLM generation failed: {e}")
             return "Sorry, I encountered some technical issues. Please try again later."
     
+    def generate_response_stream(
+        self,
+        user_input: str,
+        context: str = "",
+        conversation_history: List[Dict[str, str]] = None,
+        user_id: str = None,
+        query_embedding: Optional[List[float]] = None
+    ) -> Iterator[str]:
+        """
+        Generate AI response as a stream of text chunks
+        
+        Args:
+            user_input: User input
+            context: Context information
+            conversation_history: Conversation history
+            user_id: User ID (semantic cache hits are only shared within one user)
+            query_embedding: Query embedding of user_input, if already computed; enables the semantic cache
+            
+        Yields:
+            str: Response text deltas, in order
+            
+        Raises:
+            Exception: If the NIM stream fails after part of the response was yielded
+        """
+        messages = self._build_messages(user_input, context, conversation_history)
+        
+        cached, cache_keys = self._cache_lookup(messages, user_id, query_embedding)
+        if cached is not None:
+            yield cached
+            return
+        
+        try:
+            stream = self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=1000,
+                temperature=0.7,
+                stream=True
+            )
+        except Exception as e:
+            print(f"❌ NVIDIA NIM streaming failed: {e}")
+            yield self._generate_simple_response(messages)
+            return
+        
+        parts = []
+        try:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    parts.append(delta)
+                    yield delta
+            self._cache_store(cache_keys, ''.join(parts).strip())
+        except Exception as e:
+            print(f"❌ NVIDIA NIM streaming failed: {e}")
+            # Part of the response already went out: the caller must not treat it as complete
+            if parts:
+                raise
+            # Nothing sent yet: fall back to the simplified response as a single chunk
+            yield self._generate_simple_response(messages)
+        finally:
+            # Also runs when the consumer closes us early (client disconnected)
+            stream.close()
+    
+    def _build_messages(
+        self,
+        user_input: str,
+        context: str,
+        conversation_history: List[Dict[str, str]] = None
+    ) -> List[Dict[str, str]]:
+        """Build chat messages: system prompt, recent history, current input"""
+        # Build system prompt
+        messages = [{"role": "system", "content": self._build_system_prompt(context)}]
+        
+        # Add conversation history: most recent turns that fit the token budget
+        if conversation_history:
+            budget = HISTORY_TOKEN_BUDGET
+            kept = []
+            for turn in reversed(conversation_history):
+                cost = _count_tokens(turn.get("user_input", "")) + _count_tokens(turn.get("response", ""))
+                if cost > budget:
+                    break
+                budget -= cost
+                kept.append(turn)
+            for turn in reversed(kept):
+                messages.append({"role": "user", "content": turn.get("user_input", "")})
+                messages.append({"role": "assistant", "content": turn.get("response", "")})
+        
+        # Add current user input
+        messages.append({"role": "user", "content": user_input})
+        return messages
+    
     def _build_system_prompt(self, context: str) -> str:
         """Build system prompt"""
-        base_prompt = """You are an intelligent personal memory assistant named UniMem AI. Your main functions are:
-
-        ##  Core Task
-        Directly use the provided memory information to answer user questions - don't ask the user back!
-
-        ## ✅ Correct Answering Approach
-        When the user asks: "What is Gregory's course about?"
-        If there is information in memory, answer directly:
-        "Gregory's course is about time series analysis, panel data, and forecasting methods! Specifically, it includes Class #3 and Class #4, covering statistical analysis and forecasting techniques for time series data."
-
-        ## ❌ Wrong Answering Approach
-        Don't say:
-        - "According to the provided information..." (too stiff)
-        - "Please tell me more about..." (don't ask back)
-        - "I need to confirm..." (don't question the memory)
-        - "Gregory's course is probably about..." (don't be vague)
-
-        ## 📋 Answering Principles
-        1. **Direct Answer**: If information is in memory, answer directly and clearly
-        2. **Confident Expression**: Use affirmative tone, don't say "maybe", "probably"
-        3. **Specific Details**: Use specific details from memory
-        4. **Natural Conversation**: Communicate like a friend, use emojis appropriately 😊
-        5. **Admit Not Knowing**: Only say you don't know when there's truly no information in memory
-
-        ## 🔑 Key Instructions
-        - Prioritize using the "Current Memory Information" provided below
-        - Memory information is fact, don't question it
-        - Don't make users repeat information that's already in memory
-
-        """
-
         if context:
             # Has context - emphasize using this information
-            base_prompt += f"""
-
-    ## 📚 Current Memory Information
-    The following are relevant memories found by the system. Please use this information directly to answer the user's question:
-
-    {context}
-
-    **Important Note**: The above memory information is the factual basis you should use. Please answer the user directly and confidently using this information, don't ask the user about content that's already in memory!
-    """
-        else:
-            # No context - politely inform
-            base_prompt += """
-
-    ## ⚠️ Notice
-    Currently no relevant memory information was found. Please politely tell the user you don't have relevant memories yet, and ask if they need information about something else.
-    """
+            return _CONTEXT_SYSTEM_PROMPT.format(context=context)
+        # No context - politely inform
+        return _NO_CONTEXT_SYSTEM_PROMPT
+    
+    def _cache_lookup(
+        self,
+        messages: List[Dict[str, str]],
+        user_id: str = None,
+        query_embedding: Optional[List[float]] = None
+    ) -> Tuple[Optional[str], Tuple]:
+        """
+        Look up a cached response for these messages
         
-        return base_prompt
+        Args:
+            messages: Chat messages, the last one being the user question
+            user_id: User ID the cache entries are scoped to
+            query_embedding: Question embedding; without it only the exact tier is checked
+            
+        Returns:
+            (response or None, cache keys to pass to _cache_store on a miss)
+        """
+        exact_key = hashlib.sha256(json.dumps([user_id, messages], sort_keys=True).encode('utf-8')).digest()
+        prefix_key = hashlib.sha256(json.dumps([user_id, messages[:-1]], sort_keys=True).encode('utf-8')).digest()
+        with self._cache_lock:
+            cached = self._exact_cache.get(exact_key)
+            entries = self._semantic_cache.get(prefix_key)
+        if cached is not None:
+            return cached, ()
         
-
+        # Semantic tier: reuse the retrieval embedding, never embed just for the cache
+        question = None
+        if query_embedding is not None:
+            question = np.asarray(query_embedding, dtype=np.float32)
+            norm = np.linalg.norm(question)
+            question = question / norm if norm > 0 else None
+        
+        if question is not None and entries:
+            similarities = np.stack([embedding for embedding, _ in entries]) @ question
+            best = int(np.argmax(similarities))
+            if similarities[best] >= LLM_SEMANTIC_THRESHOLD:
+                return entries[best][1], ()
+        return None, (exact_key, prefix_key, question)
+    
+    def _cache_store(self, cache_keys: Tuple, response: str):
+        """Remember a completion under the keys returned by _cache_lookup"""
+        if not cache_keys or not response:
+            return
+        exact_key, prefix_key, question = cache_keys
+        with self._cache_lock:
+            self._exact_cache[exact_key] = response
+            if question is not None:
+                entries = self._semantic_cache.get(prefix_key, [])
+                self._semantic_cache[prefix_key] = entries[-(LLM_SEMANTIC_ENTRIES_PER_PREFIX - 1):] + [(question, response)]
+    
+    def _complete(self, messages: List[Dict[str, str]]) -> str:
+        """Run a chat completion (raises on API errors)"""
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=1000,
+            temperature=0.7
+        )
+        return response.choices[0].message.content.strip()
     
     def _call_nvidia_api(self, messages: List[Dict[str, str]]) -> str:
         """Call NVIDIA NIM API"""
         try:
             # Try using chat completions
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                max_tokens=1000,
-                temperature=0.7
-            )
-            
-            return response.choices[0].message.content.strip()
+            return self._complete(messages)
             
         except Exception as e:
             print(f"❌ NVIDIA NIM chat completions failed: {e}")
@@ -153,29 +354,15 @@ class LLMService:
                     user_message = message.get("content", "")
                     break
             
-            # Generate simple response based on user input
+            # Generate simple response based on user input (first matching intent wins)
             user_input_lower = user_message.lower()
-            
-            # Greetings
-            if any(word in user_input_lower for word in ["你好", "hello", "hi", "您好"]):
-                return "Hello! I'm UniMem AI assistant, I can help you manage and retrieve personal memories. How can I help you?"
-            
-            # Questions about JavaScript
-            elif any(word in user_input_lower for word in ["javascript", "js", "frontend", "programming", "前端", "编程"]):
-                return "Regarding JavaScript, I can help you search relevant technical documentation and memories. JavaScript is a widely used programming language, mainly for web development."
-            
-            # Questions about React
-            elif any(word in user_input_lower for word in ["react", "framework", "component", "框架", "组件"]):
-                return "React is a JavaScript library for building user interfaces. It uses component-based development patterns, improving code maintainability and reusability."
-            
-            # Search related
-            elif any(word in user_input_lower for word in ["搜索", "查找", "找", "search", "find"]):
-                return "I can help you search relevant memories and documents. Please tell me what you'd like to know, and I'll look for relevant information in your memories."
+            for pattern, response in _SIMPLE_INTENT_PATTERNS:
+                if pattern.search(user_input_lower):
+                    return response
             
             # Default response
-            else:
-                return f"I understand your question: '{user_message}'. Although I currently cannot use advanced AI features, I can help you search relevant memories and documents. Please tell me what specific content you'd like to know about."
-                
+            return f"I understand your question: '{user_message}'. Although I currently cannot use advanced AI features, I can help you search relevant memories and documents. Please tell me what specific content you'd like to know about."
+            
         except Exception as e:
             print(f"❌ Simple response generation failed: {e}")
             return "Sorry, I encountered some technical issues. Please try again later."
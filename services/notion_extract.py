@@ -0,0 +1,111 @@
+# Notion content extraction
+# Pure functions over Notion API objects, fully annotated and free of service
+# dependencies so the module can be compiled with mypyc as a drop-in replacement
+import io
+from typing import Any, Callable, Dict, List
+
+BlockFormatter = Callable[[Dict[str, Any]], str]
+
+_UNTITLED = 'Untitled Page'
+_TITLE_PROPERTY_NAMES = ('Name', 'name', 'Title', 'title')
+_CHECKED = '✓ '
+_UNCHECKED = '☐ '
+_SEPARATOR = '\n\n'
+
+def _rich_text(block_content: Dict[str, Any]) -> str:
+    """Concatenate the plain text of a Notion block's rich_text items"""
+    rich_text = block_content.get('rich_text')
+    if not rich_text:
+        return ''
+    return ''.join(rt.get('plain_text', '') for rt in rich_text)
+
+def _format_to_do(block_content: Dict[str, Any]) -> str:
+    text = _rich_text(block_content)
+    if not text:
+        return ''
+    return (_CHECKED if block_content.get('checked', False) else _UNCHECKED) + text
+
+def _format_code(block_content: Dict[str, Any]) -> str:
+    text = _rich_text(block_content)
+    if not text:
+        return ''
+    return f"```{block_content.get('language', '')}\n{text}\n```"
+
+# Block types rendered as prefix + rich text
+_PREFIX: Dict[str, str] = {
+    'paragraph': '',
+    'heading_1': '# ',
+    'heading_2': '## ',
+    'heading_3': '### ',
+    'bulleted_list_item': '• ',
+    'numbered_list_item': '1. ',
+    'quote': '> ',
+    'callout': '💡 '
+}
+
+# Block types needing more than a prefix -> formatter(block_content) returning the text ('' to skip)
+_BLOCK_FORMATTERS: Dict[str, BlockFormatter] = {
+    'to_do': _format_to_do,
+    'code': _format_code
+}
+
+def _title_text(prop: Dict[str, Any]) -> str:
+    """Plain text of a title property ('' if empty)"""
+    return ''.join(part.get('plain_text', '') for part in prop.get('title', []))
+
+def extract_page_title(page: Dict[str, Any]) -> str:
+    """Extract title from Notion page object"""
+    try:
+        properties: Dict[str, Any] = page.get('properties', {})
+        # Look for title property
+        for prop_value in properties.values():
+            if prop_value.get('type') == 'title':
+                title = _title_text(prop_value)
+                if title:
+                    return title
+        
+        # If no title property found, try other names
+        for prop_name in _TITLE_PROPERTY_NAMES:
+            prop = properties.get(prop_name)
+            if prop and prop.get('type') == 'title':
+                title = _title_text(prop)
+                if title:
+                    return title
+        
+        # Finally try to get from URL
+        url: str = page.get('url', '')
+        if url:
+            return url.split('/')[-1] or _UNTITLED
+        
+        return _UNTITLED
+    except Exception:
+        return _UNTITLED
+
+def extract_text_from_blocks(blocks: List[Dict[str, Any]]) -> str:
+    """Extract text content from Notion blocks"""
+    # Blocks are written straight into one buffer, separated by blank lines
+    buf = io.StringIO()
+    separator = ''
+    
+    for block in blocks:
+        block_type = block.get('type')
+        prefix = _PREFIX.get(block_type)
+        if prefix is not None:
+            # Common case: no formatter call, prefix and text go straight into the buffer
+            text = _rich_text(block.get(block_type, {}))
+            if text:
+                buf.write(separator)
+                buf.write(prefix)
+                buf.write(text)
+                separator = _SEPARATOR
+            continue
+        
+        formatter = _BLOCK_FORMATTERS.get(block_type)
+        if formatter:
+            text = formatter(block.get(block_type, {}))
+            if text:
+                buf.write(separator)
+                buf.write(text)
+                separator = _SEPARATOR
+    
+    return buf.getvalue()
@@ -1,19 +1,59 @@
 # Multimodal parsing service
 import os
 import io
-import base64
-from typing import Dict, Any, Optional, List
+import re
+import codecs
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Optional, List, Tuple
+import numpy as np
 from fastapi import UploadFile, HTTPException
-import PyPDF2
+import pypdfium2 as pdfium
 import docx
 from PIL import Image
 import pytesseract
 from pdf2image import convert_from_bytes
 import requests
+import charset_normalizer
 from config import settings
+from utils.memory_utils import minhash_signature, MINHASH_PERMUTATIONS
+from utils.text_utils import estimate_tokens
 from services.embedding_service import embedding_service
+from services.embedding_cache import embedding_cache
 from services.database_service import database_service
 
+try:
+    from chonkie import FastChunker
+except ImportError:  # Optional: falls back to the token-based paragraph/sentence splitter
+    FastChunker = None
+
+logger = logging.getLogger(__name__)
+
+# FastChunker budgets in UTF-8 bytes; 2 bytes per estimated token keeps CJK text under max_tokens
+CHUNKER_BYTES_PER_TOKEN = 2
+# Single-byte boundaries only (FastChunker scans bytes, so '。' cannot be a delimiter)
+CHUNKER_DELIMITERS = "\n.?!"
+
+_PARAGRAPH_SPLIT = re.compile(r'\n\n+')
+# Zero-width split after sentence-ending punctuation keeps the delimiter on its sentence
+_SENTENCE_SPLIT = re.compile(r'(?<=[。.!?])')
+
+UPLOAD_READ_CHUNK_SIZE = 1024 * 1024
+
+# Estimated Jaccard similarity at which a chunk counts as a repeat of an earlier one
+CHUNK_DUPLICATE_THRESHOLD = 0.95
+
+# Rasterization resolution for scanned PDF pages
+OCR_DPI = 150
+
+# Tesseract is CPU-bound; pages are OCR'd in separate processes
+_OCR_POOL = ProcessPoolExecutor(max_workers=os.cpu_count())
+
+def _ocr_page(image_bytes: bytes) -> str:
+    """OCR one PNG-encoded page (top-level so it can run in the process pool)"""
+    return pytesseract.image_to_string(Image.open(io.BytesIO(image_bytes)), lang='chi_sim+eng')
+
 class ParserService:
     """
     Multimodal parsing service - Handles files in different formats such as text, images, audio, documents, etc.
@@ -32,78 +72,238 @@ class ParserService:
             'gif': self._parse_image
         }
         self.max_tokens = 6000  # Set maximum token count with some margin
+        self._chunker = FastChunker(
+            chunk_size=self.max_tokens * CHUNKER_BYTES_PER_TOKEN,
+            delimiters=CHUNKER_DELIMITERS
+        ) if FastChunker is not None else None
     
     def _split_text_into_chunks(self, text: str, max_tokens: int = None) -> List[str]:
         """Split long text into multiple chunks"""
         if max_tokens is None:
             max_tokens = self.max_tokens
         
-        # More conservative token estimation: Chinese characters 1.2x, English words 1.5x
-        def estimate_tokens(text: str) -> int:
-            chinese_chars = len([c for c in text if '\u4e00' <= c <= '\u9fff'])
-            english_words = len(text.split())
-            # More conservative estimation
-            return int(chinese_chars * 1.2 + english_words * 1.5)
-        
         if estimate_tokens(text) <= max_tokens:
             return [text]
         
-        # Split by paragraphs
-        paragraphs = text.split('\n\n')
+        if self._chunker is not None and max_tokens == self.max_tokens:
+            try:
+                chunks = [chunk.text.strip() for chunk in self._chunker.chunk(text)]
+                return [chunk for chunk in chunks if chunk]
+            except UnicodeDecodeError:
+                # A forced split landed inside a multi-byte character; use the token-based splitter
+                logger.debug("FastChunker split inside a character, falling back")
+        
+        # Split by paragraphs, accumulating pieces with a running token count
+        paragraphs = _PARAGRAPH_SPLIT.split(text)
         chunks = []
-        current_chunk = ""
+        current_pieces = []
+        current_tokens = 0
         
         for paragraph in paragraphs:
+            para_tokens = estimate_tokens(paragraph)
             # If a single paragraph exceeds the limit, need further splitting
-            if estimate_tokens(paragraph) > max_tokens:
+            if para_tokens > max_tokens:
                 # Save current chunk first
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                    current_chunk = ""
+                if current_pieces:
+                    chunks.append("\n\n".join(current_pieces).strip())
+                    current_pieces = []
+                    current_tokens = 0
                 
                 # Split overly long paragraph
                 sub_chunks = self._split_long_paragraph(paragraph, max_tokens)
                 chunks.extend(sub_chunks)
-            elif estimate_tokens(current_chunk + paragraph) <= max_tokens:
-                current_chunk += paragraph + "\n\n"
+            elif current_tokens + para_tokens <= max_tokens:
+                current_pieces.append(paragraph)
+                current_tokens += para_tokens
             else:
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                current_chunk = paragraph + "\n\n"
+                if current_pieces:
+                    chunks.append("\n\n".join(current_pieces).strip())
+                current_pieces = [paragraph]
+                current_tokens = para_tokens
         
-        if current_chunk:
-            chunks.append(current_chunk.strip())
+        if current_pieces:
+            chunks.append("\n\n".join(current_pieces).strip())
         
         return chunks
     
     def _split_long_paragraph(self, paragraph: str, max_tokens: int) -> List[str]:
         """Split overly long paragraph"""
-        def estimate_tokens(text: str) -> int:
-            chinese_chars = len([c for c in text if '\u4e00' <= c <= '\u9fff'])
-            english_words = len(text.split())
-            return int(chinese_chars * 1.2 + english_words * 1.5)
-        
         # Split by sentences
-        sentences = paragraph.split('。')
+        sentences = _SENTENCE_SPLIT.split(paragraph)
         chunks = []
-        current_chunk = ""
+        current_pieces = []
+        current_tokens = 0
         
         for sentence in sentences:
             if not sentence.strip():
                 continue
-                
-            if estimate_tokens(current_chunk + sentence) <= max_tokens:
-                current_chunk += sentence + "。"
+            
+            sentence_tokens = estimate_tokens(sentence)
+            if current_tokens + sentence_tokens <= max_tokens:
+                current_pieces.append(sentence)
+                current_tokens += sentence_tokens
             else:
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                current_chunk = sentence + "。"
+                if current_pieces:
+                    chunks.append("".join(current_pieces).strip())
+                current_pieces = [sentence]
+                current_tokens = sentence_tokens
         
-        if current_chunk:
-            chunks.append(current_chunk.strip())
+        if current_pieces:
+            chunks.append("".join(current_pieces).strip())
         
         return chunks
     
+    def _embed_texts(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        Embed texts, reusing cached embeddings and batching requests for the rest
+        (falls back to one request per text if the batch fails)
+        
+        Args:
+            texts: Texts to embed
+            
+        Returns:
+            List: Embedding per text, None where the text could not be embedded
+        """
+        # Fast first tier: in-process LRU of recently embedded texts
+        embeddings = [embedding_service.peek(text, input_type="passage") for text in texts]
+        pending = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if not pending:
+            return embeddings
+        
+        # Second tier: reuse embeddings of previously uploaded identical content
+        model = embedding_service.model
+        hashes = {i: embedding_cache.content_hash(texts[i]) for i in pending}
+        cached = embedding_cache.get_many(list(hashes.values()), model)
+        missing = []
+        for i in pending:
+            embeddings[i] = cached.get(hashes[i])
+            if embeddings[i] is None:
+                missing.append(i)
+        if not missing:
+            return embeddings
+        
+        missing_texts = [texts[i] for i in missing]
+        try:
+            fresh = embedding_service.generate_embeddings_batch(missing_texts, input_type="passage")
+        except Exception as e:
+            logger.warning("Batch embedding of %d texts failed, retrying individually: %s", len(missing_texts), e)
+            fresh = []
+            for i, text in zip(missing, missing_texts):
+                try:
+                    fresh.append(embedding_service.generate_embedding(text=text, input_type="passage"))
+                except Exception as chunk_error:
+                    logger.warning("Failed to process chunk %d: %s", i, chunk_error, exc_info=True)
+                    fresh.append(None)
+        
+        new_entries = {}
+        for i, embedding in zip(missing, fresh):
+            embeddings[i] = embedding
+            if embedding is not None:
+                new_entries[hashes[i]] = embedding
+        embedding_cache.set_many(new_entries, model)
+        return embeddings
+    
+    def _store_chunk_memories(
+        self,
+        chunk_entries: List[tuple],
+        parsed_content: Dict[str, Any],
+        file: UploadFile,
+        file_size: int,
+        s3_data: Dict[str, Any],
+        user_id: str
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Persist one batch of additional chunk memories with batched writes
+        
+        Args:
+            chunk_entries: (chunk_index, chunk, embedding) tuples
+            parsed_content: Parser output the chunks belong to
+            file: Uploaded file
+            file_size: Size of the uploaded file in bytes
+            s3_data: Data returned from S3 upload
+            user_id: User ID
+            
+        Returns:
+            (memory_id, chunk_index and content preview per stored chunk, number of chunks that failed to store)
+        """
+        file_extension = file.filename.rpartition('.')[2].lower()
+        chunk_memories = [{
+            'content': chunk,
+            'memory_type': parsed_content['type'],
+            'embedding': chunk_embedding,
+            'user_id': user_id,
+            'metadata': {
+                'original_filename': file.filename,
+                'file_size': file_size,
+                'file_extension': file_extension,
+                's3_key': s3_data.get('s3_key'),
+                's3_url': s3_data.get('file_url'),
+                'chunk_index': chunk_index,
+                'total_chunks': parsed_content['metadata'].get('total_chunks', 1),
+                'is_partial': True,
+                **parsed_content.get('metadata', {})
+            },
+            'source': s3_data.get('file_url'),
+            'summary': chunk[:200] + "..." if len(chunk) > 200 else chunk,
+            'tags': parsed_content.get('tags', [])
+        } for chunk_index, chunk, chunk_embedding in chunk_entries]
+        
+        try:
+            chunk_memory_ids = database_service.create_memories(chunk_memories)
+        except Exception:
+            logger.warning("Failed to store %d chunk memories", len(chunk_memories), exc_info=True)
+            return [], len(chunk_memories)
+        
+        return [{
+            'memory_id': chunk_memory_id,
+            'chunk_index': chunk_index,
+            'content_preview': chunk[:100] + "..." if len(chunk) > 100 else chunk
+        } for (chunk_index, chunk, _), chunk_memory_id in zip(chunk_entries, chunk_memory_ids)], 0
+    
+    def _drop_duplicate_chunks(self, parsed_content: Dict[str, Any]):
+        """
+        Remove additional chunks that are near-duplicates of an earlier chunk (MinHash estimate),
+        updating total_chunks and recording the number skipped in the parsed metadata
+        """
+        chunks = [parsed_content['text']] + parsed_content['additional_chunks']
+        signatures = np.empty((len(chunks), MINHASH_PERMUTATIONS), dtype=np.uint64)
+        signatures[0] = minhash_signature(chunks[0])
+        kept = []
+        for chunk in chunks[1:]:
+            signature = minhash_signature(chunk)
+            count = len(kept) + 1
+            if (signatures[:count] == signature).mean(axis=1).max() >= CHUNK_DUPLICATE_THRESHOLD:
+                continue
+            signatures[count] = signature
+            kept.append(chunk)
+        
+        skipped = len(chunks) - 1 - len(kept)
+        if skipped:
+            logger.info("Skipping %d near-duplicate chunk(s) of %d", skipped, len(chunks))
+            parsed_content['additional_chunks'] = kept
+            parsed_content['metadata']['total_chunks'] = len(kept) + 1
+        parsed_content['metadata']['duplicate_chunks_skipped'] = skipped
+    
+    async def _read_upload(self, file: UploadFile) -> bytes:
+        """Read an upload from the start in 1 MB pieces, rejecting it with 413 once it exceeds MAX_FILE_SIZE"""
+        too_large = HTTPException(
+            status_code=413,
+            detail=f"File too large. Maximum size: {settings.MAX_FILE_SIZE // (1024 * 1024)} MB"
+        )
+        if file.size is not None and file.size > settings.MAX_FILE_SIZE:
+            raise too_large
+        
+        # Reset file pointer
+        await file.seek(0)
+        pieces = []
+        total = 0
+        while piece := await file.read(UPLOAD_READ_CHUNK_SIZE):
+            total += len(piece)
+            if total > settings.MAX_FILE_SIZE:
+                raise too_large
+            pieces.append(piece)
+        return b"".join(pieces)
+    
     async def parse_file(self, file: UploadFile, s3_data: Dict[str, Any], user_id: str) -> Dict[str, Any]:
         """
         Parse uploaded file and create memory unit
@@ -117,7 +317,7 @@ class ParserService:
             Dict: Parsing result and memory ID
         """
         try:
-            file_extension = file.filename.split('.')[-1].lower()
+            file_extension = file.filename.rpartition('.')[2].lower()
             
             if file_extension not in self.supported_types:
                 raise HTTPException(
@@ -125,19 +325,15 @@ class ParserService:
                     detail=f"Unsupported file type: {file_extension}"
                 )
             
-            # Reset file pointer
-            await file.seek(0)
-            file_content = await file.read()
+            file_content = await self._read_upload(file)
             
             # Parse based on file type
             parser_func = self.supported_types[file_extension]
             parsed_content = await parser_func(file_content, file)
             
-            # Generate embedding
-            embedding = embedding_service.generate_embedding(
-                text=parsed_content['text'],
-                input_type="passage"
-            )
+            # Skip embedding repeated boilerplate (headers, footers, near-identical rows)
+            if parsed_content.get('additional_chunks'):
+                self._drop_duplicate_chunks(parsed_content)
             
             # Prepare metadata, merge additional metadata from s3_data
             metadata = {
@@ -153,102 +349,137 @@ class ParserService:
             if s3_data and isinstance(s3_data.get('metadata'), dict):
                 metadata.update(s3_data['metadata'])
             
-            # Create memory unit
-            memory_id = database_service.create_memory(
-                content=parsed_content['text'],
-                memory_type=parsed_content['type'],
-                embedding=embedding,
-                user_id=user_id,
-                metadata=metadata,
-                source=s3_data.get('file_url'),
-                summary=parsed_content.get('summary'),
-                tags=parsed_content.get('tags', [])
-            )
-            # Process additional text chunks (if any)
+            # Embed and store in mini-batches: while one batch is written, the next is embedded
+            texts = [parsed_content['text']] + parsed_content.get('additional_chunks', [])
+            batch_size = max(1, settings.EMBEDDING_BATCH_SIZE)
+            embed_task = asyncio.create_task(asyncio.to_thread(self._embed_texts, texts[:batch_size]))
+            write_task = None
+            memory_id = None
+            embedding = None
             additional_memories = []
-            if 'additional_chunks' in parsed_content:
-                for i, chunk in enumerate(parsed_content['additional_chunks']):
-                    try:
-                        # Generate embedding for each chunk
-                        chunk_embedding = embedding_service.generate_embedding(
-                            text=chunk,
-                            input_type="passage"
-                        )
+            failed_chunks = 0
+            
+            try:
+                for start in range(0, len(texts), batch_size):
+                    embeddings = await embed_task
+                    if start + batch_size < len(texts):
+                        embed_task = asyncio.create_task(asyncio.to_thread(
+                            self._embed_texts, texts[start + batch_size:start + 2 * batch_size]
+                        ))
+                    
+                    if start == 0:
+                        embedding = embeddings[0]
+                        if embedding is None:
+                            raise ValueError("Failed to generate embedding for document text")
                         
-                        # ✅ Create additional memory unit - add user_id parameter
-                        chunk_memory_id = database_service.create_memory(
-                            content=chunk,
+                        # Create memory unit
+                        memory_id = await asyncio.to_thread(
+                            database_service.create_memory,
+                            content=parsed_content['text'],
                             memory_type=parsed_content['type'],
-                            embedding=chunk_embedding,
-                            user_id=user_id,  # ✅ Add user_id parameter
-                            metadata={
-                                'original_filename': file.filename,
-                                'file_size': len(file_content),
-                                'file_extension': file_extension,
-                                's3_key': s3_data.get('s3_key'),
-                                's3_url': s3_data.get('file_url'),
-                                'chunk_index': i + 1,
-                                'total_chunks': parsed_content['metadata'].get('total_chunks', 1),
-                                'is_partial': True,
-                                **parsed_content.get('metadata', {})
-                            },
+                            embedding=embedding,
+                            user_id=user_id,
+                            metadata=metadata,
                             source=s3_data.get('file_url'),
-                            summary=chunk[:200] + "..." if len(chunk) > 200 else chunk,
+                            summary=parsed_content.get('summary'),
                             tags=parsed_content.get('tags', [])
                         )
-                        
-                        additional_memories.append({
-                            'memory_id': chunk_memory_id,
-                            'chunk_index': i + 1,
-                            'content_preview': chunk[:100] + "..." if len(chunk) > 100 else chunk
-                        })
-                        
-                    except Exception as e:
-                        print(f"⚠️  Failed to process chunk {i + 1}: {e}")
-                        import traceback
-                        traceback.print_exc()
-                        continue
-            
+                    
+                    # Additional text chunks (if any) in this batch, indexed from 1
+                    chunk_entries = [
+                        (start + offset, texts[start + offset], chunk_embedding)
+                        for offset, chunk_embedding in enumerate(embeddings)
+                        if start + offset > 0 and chunk_embedding is not None
+                    ]
+                    if write_task is not None:
+                        stored, failed = await write_task
+                        additional_memories.extend(stored)
+                        failed_chunks += failed
+                    write_task = asyncio.create_task(asyncio.to_thread(
+                        self._store_chunk_memories, chunk_entries, parsed_content, file, len(file_content), s3_data, user_id
+                    )) if chunk_entries else None
+                
+                if write_task is not None:
+                    stored, failed = await write_task
+                    additional_memories.extend(stored)
+                    failed_chunks += failed
+            finally:
+                # On failure, wait for in-flight embed/write threads (they cannot be cancelled) so
+                # no chunk write outlives the request and their errors are retrieved
+                await asyncio.gather(*[task for task in (embed_task, write_task) if task is not None], return_exceptions=True)
+            
+            # The document memory exists either way; chunks that could not be stored are reported, not hidden
             return {
-                'success': True,
+                'success': failed_chunks == 0,
                 'memory_id': memory_id,
                 'parsed_content': parsed_content,
                 'embedding_dimension': len(embedding),
-                'additional_memories': additional_memories
+                'additional_memories': additional_memories,
+                'failed_chunks': failed_chunks
             }
             
+        except HTTPException:
+            raise
         except Exception as e:
             print(f"❌ File parsing failed: {e}")
             raise HTTPException(status_code=500, detail=f"Parsing failed: {str(e)}")
     
+    @staticmethod
+    def _extract_pdf_text(content: bytes) -> Tuple[str, int]:
+        """Extract the text layer of a PDF one page at a time (blocking; run in a worker thread)
+        
+        Returns:
+            (text, page count)
+        """
+        pdf = pdfium.PdfDocument(content)
+        try:
+            page_texts = []
+            for page_num in range(len(pdf)):
+                page = pdf[page_num]
+                try:
+                    textpage = page.get_textpage()
+                    try:
+                        # PDFium reports line breaks as CRLF
+                        page_texts.append(textpage.get_text_range().replace('\r\n', '\n'))
+                    finally:
+                        textpage.close()
+                finally:
+                    page.close()
+            return "\n".join(page_texts).strip(), len(pdf)
+        finally:
+            pdf.close()
+    
     async def _parse_pdf(self, content: bytes, file: UploadFile) -> Dict[str, Any]:
         """Parse PDF file"""
         try:
-            pdf_reader = PyPDF2.PdfReader(io.BytesIO(content))
-            text = ""
-            
-            # First try to extract text directly
-            for page_num in range(len(pdf_reader.pages)):
-                page = pdf_reader.pages[page_num]
-                page_text = page.extract_text()
-                text += page_text + "\n"
-            
-            # Clean text
-            text = text.strip()
+            # First try to extract text directly (PDFium, in C), off the event loop
+            text, page_count = await asyncio.to_thread(self._extract_pdf_text, content)
             
             # If text is empty or very short, try OCR
             if not text or len(text) < 50:
                 print("📄 PDF text is empty, trying OCR recognition...")
                 try:
                     # Convert PDF to images
-                    images = convert_from_bytes(content)
-                    ocr_text = ""
+                    # 150 DPI grayscale is enough for printed text; pdftoppm rasterizes pages in parallel
+                    images = convert_from_bytes(
+                        content,
+                        dpi=OCR_DPI,
+                        grayscale=True,
+                        thread_count=max(1, (os.cpu_count() or 2) // 2)
+                    )
+                    page_bytes = []
+                    for image in images:
+                        buffer = io.BytesIO()
+                        image.save(buffer, format='PNG')
+                        page_bytes.append(buffer.getvalue())
                     
-                    for i, image in enumerate(images):
-                        print(f"🔍 OCR processing page {i+1}...")
-                        # Use pytesseract for OCR
-                        page_text = pytesseract.image_to_string(image, lang='chi_sim+eng')
-                        ocr_text += page_text + "\n"
+                    # OCR pages in parallel worker processes, keeping the event loop free
+                    print(f"🔍 OCR processing {len(page_bytes)} page(s)...")
+                    loop = asyncio.get_running_loop()
+                    page_texts = await asyncio.gather(*(
+                        loop.run_in_executor(_OCR_POOL, _ocr_page, data) for data in page_bytes
+                    ))
+                    ocr_text = "\n".join(page_texts)
                     
                     if ocr_text.strip():
                         text = ocr_text.strip()
@@ -270,8 +501,8 @@ class ParserService:
                     'text': text_chunks[0],
                     'type': 'document',
                     'metadata': {
-                        'page_count': len(pdf_reader.pages),
-                        'parser': 'PyPDF2+OCR' if len(text) > 50 else 'PyPDF2',
+                        'page_count': page_count,
+                        'parser': 'pypdfium2+OCR' if len(text) > 50 else 'pypdfium2',
                         'total_chunks': len(text_chunks),
                         'chunk_index': 0,
                         'is_partial': True
@@ -285,8 +516,8 @@ class ParserService:
                     'text': text,
                     'type': 'document',
                     'metadata': {
-                        'page_count': len(pdf_reader.pages),
-                        'parser': 'PyPDF2+OCR' if len(text) > 50 else 'PyPDF2'
+                        'page_count': page_count,
+                        'parser': 'pypdfium2+OCR' if len(text) > 50 else 'pypdfium2'
                     },
                     'summary': text[:200] + "..." if len(text) > 200 else text,
                     'tags': ['pdf', 'document']
@@ -333,26 +564,24 @@ class ParserService:
                 )
             
             prs = Presentation(io.BytesIO(content))
-            text = ""
+            parts = []
             
             # Extract text from all slides
             for slide_num, slide in enumerate(prs.slides, 1):
-                text += f"\n--- Slide {slide_num} ---\n"
+                parts.append(f"\n--- Slide {slide_num} ---\n")
                 
-                # Extract text from text boxes
+                # Extract text from text boxes (explicit flags instead of hasattr probes)
                 for shape in slide.shapes:
-                    if hasattr(shape, "text"):
-                        text += shape.text + "\n"
+                    if shape.has_text_frame:
+                        parts.append(shape.text_frame.text + "\n")
                     # Handle tables
-                    elif hasattr(shape, "table"):
+                    elif shape.has_table:
                         for row in shape.table.rows:
-                            for cell in row.cells:
-                                if cell.text:
-                                    text += cell.text + "\t"
-                            text += "\n"
+                            cell_texts = (cell.text_frame.text for cell in row.cells)
+                            parts.append("".join(cell_text + "\t" for cell_text in cell_texts if cell_text) + "\n")
             
             # Clean text
-            text = text.strip()
+            text = "".join(parts).strip()
             
             return {
                 'text': text,
@@ -373,19 +602,18 @@ class ParserService:
     async def _parse_text(self, content: bytes, file: UploadFile) -> Dict[str, Any]:
         """Parse text file"""
         try:
-            # Try different encodings
-            encodings = ['utf-8', 'gbk', 'gb2312', 'latin-1']
-            text = ""
-            
-            for encoding in encodings:
-                try:
-                    text = content.decode(encoding)
-                    break
-                except UnicodeDecodeError:
-                    continue
-            
-            if not text:
-                text = content.decode('utf-8', errors='ignore')
+            # UTF-8 BOM needs no detection; otherwise a single guided detection pass
+            if content.startswith(codecs.BOM_UTF8):
+                encoding = 'utf-8-sig'
+                text = content.decode(encoding)
+            else:
+                best = charset_normalizer.from_bytes(content).best()
+                if best is not None:
+                    encoding = best.encoding
+                    text = str(best)
+                else:
+                    encoding = 'utf-8'
+                    text = content.decode(encoding, errors='ignore')
             
             # Clean text
             text = text.strip()
@@ -394,7 +622,7 @@ class ParserService:
                 'text': text,
                 'type': 'text',
                 'metadata': {
-                    'encoding': 'utf-8',
+                    'encoding': encoding,
                     'parser': 'builtin'
                 },
                 'summary': text[:200] + "..." if len(text) > 200 else text,
@@ -407,7 +635,7 @@ class ParserService:
     async def _parse_image(self, content: bytes, file: UploadFile) -> Dict[str, Any]:
         """Parse image file"""
         try:
-            # Open image
+            # Open image (lazy: only the header is read, the original bytes stay in S3)
             image = Image.open(io.BytesIO(content))
             
             # Get image information
@@ -418,11 +646,6 @@ class ParserService:
             # Generate image description (simplified here, should use CLIP or OCR in practice)
             image_description = f"Image: {width}x{height} pixels, format: {format_name}, mode: {mode}"
             
-            # Convert image to base64 for storage
-            img_buffer = io.BytesIO()
-            image.save(img_buffer, format=format_name)
-            img_base64 = base64.b64encode(img_buffer.getvalue()).decode()
-            
             return {
                 'text': image_description,
                 'type': 'image',
@@ -431,7 +654,6 @@ class ParserService:
                     'height': height,
                     'format': format_name,
                     'mode': mode,
-                    'base64_data': img_base64,
                     'parser': 'PIL'
                 },
                 'summary': f"Image file: {file.filename} ({width}x{height})",
@@ -444,11 +666,10 @@ class ParserService:
     async def parse_text_input(self, text: str, source: Optional[str], user_id: str) -> Dict[str, Any]:
         """Parse plain text input and create memory"""
         try:
-            # Generate embedding
-            embedding = embedding_service.generate_embedding(
-                text=text,
-                input_type="passage"
-            )
+            # Generate embedding (reused if identical text was embedded before)
+            embedding = self._embed_texts([text])[0]
+            if embedding is None:
+                raise ValueError("Failed to generate embedding for text input")
             
             # ✅ Correct way - following Lin's version
             memory_id = database_service.create_memory(
@@ -473,9 +694,7 @@ class ParserService:
             }
             
         except Exception as e:
-            print(f"❌ Text parsing failed: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Text parsing failed: %s", e)
             raise HTTPException(status_code=500, detail=f"Text parsing failed: {str(e)}")
         
     def get_supported_types(self) -> List[str]:
@@ -486,7 +705,7 @@ class ParserService:
         """Health check"""
         try:
             # Check dependency libraries
-            import PyPDF2
+            import pypdfium2 as pdfium
             import docx
             from PIL import Image
             
@@ -494,7 +713,7 @@ class ParserService:
                 'status': 'healthy',
                 'supported_types': self.get_supported_types(),
                 'dependencies': {
-                    'PyPDF2': 'available',
+                    'pypdfium2': 'available',
                     'python-docx': 'available',
                     'PIL': 'available'
                 }
@@ -1,10 +1,30 @@
 # S3 Service
+import io
+import asyncio
 import boto3
+from boto3.s3.transfer import TransferConfig
 from fastapi import UploadFile, HTTPException
 from datetime import datetime
 from urllib.parse import quote
 from config import settings
 
+# Multipart transfer settings: objects above 8 MB are uploaded as 8 MB parts, up to 10 in parallel
+S3_MULTIPART_THRESHOLD = 8 * 1024 * 1024
+S3_MULTIPART_CHUNKSIZE = 8 * 1024 * 1024
+S3_MAX_CONCURRENCY = 10
+
+class _KeepOpenFile:
+    """File proxy whose close() is a no-op (s3transfer closes the fileobj after a single-part upload)"""
+    
+    def __init__(self, fileobj):
+        self._fileobj = fileobj
+    
+    def __getattr__(self, name):
+        return getattr(self._fileobj, name)
+    
+    def close(self):
+        pass
+
 class S3Service:
     """S3 file upload service"""
     
@@ -23,20 +43,40 @@ class S3Service:
             region_name=settings.AWS_REGION
         )
         self.bucket_name = settings.S3_BUCKET_NAME
+        
+        # Shared transfer config for managed (multipart, per-part retried) uploads
+        self.transfer_config = TransferConfig(
+            multipart_threshold=S3_MULTIPART_THRESHOLD,
+            multipart_chunksize=S3_MULTIPART_CHUNKSIZE,
+            max_concurrency=S3_MAX_CONCURRENCY,
+            use_threads=True
+        )
     
     def validate_file(self, file: UploadFile) -> bool:
         """Validate file format and size"""
         if not file.filename:
             raise HTTPException(status_code=400, detail="Filename cannot be empty")
         
-        extension = file.filename.split(".")[-1].lower()
+        extension = file.filename.rpartition(".")[2].lower()
         if extension not in settings.ALLOWED_EXTENSIONS:
             raise HTTPException(
                 status_code=400,
-                detail=f"Unsupported file format. Allowed: {', '.join(settings.ALLOWED_EXTENSIONS)}"
+                detail=f"Unsupported file format. Allowed: {', '.join(sorted(settings.ALLOWED_EXTENSIONS))}"
             )
+        
+        # Reject on the declared size before any of the body is touched
+        if file.size is not None:
+            self.validate_file_size(file.size)
         return True
     
+    def validate_file_size(self, file_size: int):
+        """Reject files larger than MAX_FILE_SIZE with 413"""
+        if file_size > settings.MAX_FILE_SIZE:
+            raise HTTPException(
+                status_code=413,
+                detail=f"File too large. Maximum size: {settings.MAX_FILE_SIZE // (1024 * 1024)} MB"
+            )
+    
     async def upload_file(self, file: UploadFile) -> dict:
         """
         Upload file to S3
@@ -58,23 +98,32 @@ class S3Service:
             
             print(f"📤 Starting upload: {original_filename}")
             
-            # Read file content
-            file_content = await file.read()
-            file_size = len(file_content)
+            # Measure size from the underlying (spooled) file without reading it into memory
+            file_obj = file.file
+            file_obj.seek(0, io.SEEK_END)
+            file_size = file_obj.tell()
+            file_obj.seek(0)
+            self.validate_file_size(file_size)
             
             print(f"📊 File size: {file_size / 1024:.2f} KB")
             
-            # Upload to S3
-            self.client.put_object(
-                Bucket=self.bucket_name,
-                Key=s3_key,
-                Body=file_content,
-                ContentType=file.content_type or 'application/octet-stream',
-                Metadata={
-                    'original_filename': quote(original_filename),
-                    'upload_timestamp': timestamp
-                }
+            # Stream to S3 (managed transfer: large files go up as parallel multipart parts)
+            # boto3 blocks, so run it off the event loop; the caller's file stays open for parsing
+            await asyncio.to_thread(
+                self.client.upload_fileobj,
+                _KeepOpenFile(file_obj),
+                self.bucket_name,
+                s3_key,
+                ExtraArgs={
+                    'ContentType': file.content_type or 'application/octet-stream',
+                    'Metadata': {
+                        'original_filename': quote(original_filename),
+                        'upload_timestamp': timestamp
+                    }
+                },
+                Config=self.transfer_config
             )
+            file_obj.seek(0)
             file_url = f"s3://{self.bucket_name}/{s3_key}"
             
             print(f"✅ Upload successful: {s3_key}")
@@ -84,10 +133,12 @@ class S3Service:
                 "s3_key": s3_key,
                 "file_url": file_url,
                 "file_size": file_size,
-                "file_extension": original_filename.split(".")[-1].lower(),
+                "file_extension": original_filename.rpartition(".")[2].lower(),
                 "upload_time": timestamp
             }
             
+        except HTTPException:
+            raise
         except Exception as e:
             error_msg = str(e)
             print(f"❌ Upload failed: {error_msg}")
@@ -151,13 +202,16 @@ class S3Service:
                 for key, value in metadata.items():
                     s3_metadata[str(key)] = str(value)[:1000]  # S3 metadata value limit is 2KB
             
-            # Upload to S3
-            self.client.put_object(
-                Bucket=self.bucket_name,
-                Key=s3_key,
-                Body=file_content,
-                ContentType='text/plain; charset=utf-8',
-                Metadata=s3_metadata
+            # Upload to S3 (managed transfer: large content goes up as parallel multipart parts)
+            self.client.upload_fileobj(
+                io.BytesIO(file_content),
+                self.bucket_name,
+                s3_key,
+                ExtraArgs={
+                    'ContentType': 'text/plain; charset=utf-8',
+                    'Metadata': s3_metadata
+                },
+                Config=self.transfer_config
             )
             file_url = f"s3://{self.bucket_name}/{s3_key}"
             
@@ -4,6 +4,7 @@ UniMem AI Startup Script
 """
 import os
 import sys
+import hashlib
 import subprocess
 from pathlib import Path
 
@@ -27,11 +28,34 @@ def check_environment():
     print("✅ .env file exists")
     return True
 
+def requirements_marker() -> Path:
+    """Marker file recording a successful install of the current requirements.txt"""
+    digest = hashlib.sha256(Path("requirements.txt").read_bytes()).hexdigest()[:16]
+    return Path(f".deps_installed_{digest}")
+
 def install_dependencies():
-    """Install dependencies"""
+    """Install dependencies (skipped if SKIP_INSTALL is set or requirements.txt is unchanged)"""
+    if os.environ.get("SKIP_INSTALL"):
+        print("⏭️  SKIP_INSTALL set, skipping dependency installation")
+        return True
+    
+    marker = requirements_marker()
+    if marker.exists():
+        print("✅ Dependencies up to date")
+        return True
+    
     print("📦 Installing dependencies...")
     try:
-        subprocess.run([sys.executable, "-m", "pip", "install", "-r", "requirements.txt"], check=True)
+        try:
+            # uv resolves and downloads in parallel, much faster than pip
+            subprocess.run(["uv", "pip", "install", "--python", sys.executable, "-r", "requirements.txt"], check=True)
+        except FileNotFoundError:
+            print("ℹ️  uv not found, falling back to pip")
+            subprocess.run([sys.executable, "-m", "pip", "install", "-r", "requirements.txt"], check=True)
+        
+        for stale_marker in Path(".").glob(".deps_installed_*"):
+            stale_marker.unlink()
+        marker.touch()
         print("✅ Dependencies installed successfully")
         return True
     except subprocess.CalledProcessError as e:
@@ -39,13 +63,12 @@ def install_dependencies():
         return False
 
 def start_server():
-    """Start server"""
+    """Start server (replaces this launcher process, so no wrapper interpreter stays alive)"""
     print("🚀 Starting UniMem AI server...")
+    sys.stdout.flush()
     try:
-        subprocess.run([sys.executable, "main.py"], check=True)
-    except KeyboardInterrupt:
-        print("\n👋 Server stopped")
-    except subprocess.CalledProcessError as e:
+        os.execv(sys.executable, [sys.executable, "main.py"])
+    except OSError as e:
         print(f"❌ Failed to start server: {e}")
 
 def main():
@@ -57,12 +80,15 @@ def main():
     if not check_environment():
         return
     
-    # Install dependencies
-    if not install_dependencies():
+    # Install dependencies (skipped in production, where the image already has them)
+    if os.environ.get("ENVIRONMENT") != "production" and not install_dependencies():
         return
     
     # Start server
     start_server()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\n👋 Startup interrupted")
\ No newline at end of file
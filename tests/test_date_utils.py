@@ -0,0 +1,10 @@
+# Date utility tests
+from utils.date_utils import format_date_range
+
+def test_format_date_range_rejects_impossible_dates():
+    assert format_date_range('2024-02-31T10:00:00', '') == (None, None)
+
+def test_format_date_range_normalizes_offsets():
+    start, end = format_date_range('2024-01-01T10:00:00-00:00', '2024-01-02T10:00:00.123456+05:30')
+    assert start == '2024-01-01T10:00:00+00:00'
+    assert end == '2024-01-02T10:00:00.123456+05:30'
@@ -0,0 +1,27 @@
+# S3 Service tests
+import os
+import io
+import asyncio
+
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+os.environ.setdefault('S3_BUCKET_NAME', 'unimem-test-bucket')
+os.environ.setdefault('NVIDIA_API_KEY', 'testing')
+
+from botocore.stub import Stubber
+from fastapi import UploadFile
+from services.s3_service import s3_service
+
+def test_upload_file_leaves_file_readable():
+    """The uploaded file must stay open and rewound so it can be parsed afterwards"""
+    content = b"hello unimem\n" * 100
+    upload = UploadFile(file=io.BytesIO(content), filename="notes.txt")
+    
+    with Stubber(s3_service.client) as stubber:
+        stubber.add_response('put_object', {'ETag': '"test"'})
+        result = asyncio.run(s3_service.upload_file(upload))
+        stubber.assert_no_pending_responses()
+    
+    assert result['file_size'] == len(content)
+    assert not upload.file.closed
+    assert asyncio.run(upload.read()) == content
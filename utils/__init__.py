@@ -9,5 +9,6 @@ __all__ = [
     'clean_text',
     'extract_keywords',
     'calculate_similarity',
+    'calculate_similarity_batch',
     'format_date_range'
 ]
\ No newline at end of file
@@ -1,82 +1,114 @@
 # Date and time utility functions
 from datetime import datetime, timedelta
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 import re
+import sys
+
+try:
+    # C parser, accepts 'Z' and is faster than fromisoformat
+    from ciso8601 import parse_datetime as _parse_iso
+    _HAS_CISO8601 = True
+except ImportError:
+    _parse_iso = datetime.fromisoformat
+    _HAS_CISO8601 = False
+_utcnow = datetime.utcnow
+
+_DAYS_AGO_RE = re.compile(r'(\d+)\s*days?\s*ago')
+_WEEKS_AGO_RE = re.compile(r'(\d+)\s*weeks?\s*ago')
+_MONTHS_AGO_RE = re.compile(r'(\d+)\s*months?\s*ago')
+
+if _HAS_CISO8601 or sys.version_info >= (3, 11):
+    # Both accept a trailing 'Z' natively
+    _parse_timestamp = _parse_iso
+else:
+    def _parse_timestamp(timestamp: str) -> datetime:
+        """Parse an ISO 8601 timestamp, accepting a trailing 'Z' for UTC"""
+        if timestamp.endswith('Z'):
+            return _parse_iso(timestamp[:-1] + '+00:00')
+        return _parse_iso(timestamp)
+
+def _normalize_timestamp(timestamp: str) -> str:
+    """Validate an ISO 8601 timestamp and return it in isoformat() form"""
+    return _parse_timestamp(timestamp).isoformat()
 
 def format_date_range(start_date: str, end_date: str) -> Tuple[Optional[str], Optional[str]]:
     """Format date range"""
     try:
         # Parse start date
-        if start_date:
-            start_dt = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-            start_date = start_dt.isoformat()
-        else:
-            start_date = None
+        start_date = _normalize_timestamp(start_date) if start_date else None
         
         # Parse end date
-        if end_date:
-            end_dt = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
-            end_date = end_dt.isoformat()
-        else:
-            end_date = None
+        end_date = _normalize_timestamp(end_date) if end_date else None
         
         return start_date, end_date
         
     except ValueError:
         return None, None
 
+def _midnight(dt: datetime) -> datetime:
+    return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def _today(now: datetime) -> datetime:
+    return _midnight(now)
+
+def _yesterday(now: datetime) -> datetime:
+    return _midnight(now - timedelta(days=1))
+
+def _this_week(now: datetime) -> datetime:
+    return _midnight(now - timedelta(days=now.weekday()))
+
+def _last_week(now: datetime) -> datetime:
+    return _midnight(now - timedelta(days=now.weekday() + 7))
+
+def _this_month(now: datetime) -> datetime:
+    return _midnight(now.replace(day=1))
+
+def _last_month(now: datetime) -> datetime:
+    if now.month == 1:
+        return _midnight(now.replace(year=now.year-1, month=12, day=1))
+    return _midnight(now.replace(month=now.month-1, day=1))
+
+# Relative period name (English and Chinese) -> start of that period
+_RELATIVE_PERIODS = {
+    'today': _today, '今天': _today,
+    'yesterday': _yesterday, '昨天': _yesterday,
+    'this week': _this_week, '本周': _this_week,
+    'last week': _last_week, '上周': _last_week,
+    'this month': _this_month, '本月': _this_month,
+    'last month': _last_month, '上月': _last_month,
+}
+
 def parse_relative_date(relative_str: str) -> Optional[datetime]:
     """Parse relative date string"""
     if not relative_str:
         return None
     
-    now = datetime.utcnow()
+    now = _utcnow()
     relative_str = relative_str.lower().strip()
     
-    # Today
-    if relative_str in ['today', '今天']:
-        return now.replace(hour=0, minute=0, second=0, microsecond=0)
-    
-    # Yesterday
-    if relative_str in ['yesterday', '昨天']:
-        return (now - timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
-    
-    # This week
-    if relative_str in ['this week', '本周']:
-        days_since_monday = now.weekday()
-        return (now - timedelta(days=days_since_monday)).replace(hour=0, minute=0, second=0, microsecond=0)
-    
-    # Last week
-    if relative_str in ['last week', '上周']:
-        days_since_monday = now.weekday()
-        last_monday = now - timedelta(days=days_since_monday + 7)
-        return last_monday.replace(hour=0, minute=0, second=0, microsecond=0)
-    
-    # This month
-    if relative_str in ['this month', '本月']:
-        return now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    
-    # Last month
-    if relative_str in ['last month', '上月']:
-        if now.month == 1:
-            return now.replace(year=now.year-1, month=12, day=1, hour=0, minute=0, second=0, microsecond=0)
-        else:
-            return now.replace(month=now.month-1, day=1, hour=0, minute=0, second=0, microsecond=0)
+    # Named periods: a single dict lookup
+    period_start = _RELATIVE_PERIODS.get(relative_str)
+    if period_start:
+        return period_start(now)
     
+    return _match_ago(relative_str, now)
+
+def _match_ago(relative_str: str, now: datetime) -> Optional[datetime]:
+    """Parse "N days/weeks/months ago" strings"""
     # Parse "N days ago" format
-    days_ago_match = re.search(r'(\d+)\s*days?\s*ago', relative_str)
+    days_ago_match = _DAYS_AGO_RE.search(relative_str)
     if days_ago_match:
         days = int(days_ago_match.group(1))
         return now - timedelta(days=days)
     
     # Parse "N weeks ago" format
-    weeks_ago_match = re.search(r'(\d+)\s*weeks?\s*ago', relative_str)
+    weeks_ago_match = _WEEKS_AGO_RE.search(relative_str)
     if weeks_ago_match:
         weeks = int(weeks_ago_match.group(1))
         return now - timedelta(weeks=weeks)
     
     # Parse "N months ago" format
-    months_ago_match = re.search(r'(\d+)\s*months?\s*ago', relative_str)
+    months_ago_match = _MONTHS_AGO_RE.search(relative_str)
     if months_ago_match:
         months = int(months_ago_match.group(1))
         # Simplified: calculate as 30 days
@@ -103,43 +135,44 @@ def get_time_range_filters(
 def format_timestamp_for_display(timestamp: str) -> str:
     """Format timestamp for display"""
     try:
-        dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+        dt = _parse_timestamp(timestamp)
         return dt.strftime('%Y-%m-%d %H:%M:%S')
     except ValueError:
         return timestamp
 
-def get_relative_time_description(timestamp: str) -> str:
-    """Get relative time description"""
+def _relative_desc(days: int, seconds: int) -> str:
+    """Describe a time difference given as timedelta days and seconds, on plain ints only"""
+    if days > 0:
+        if days == 1:
+            return "yesterday"
+        if days < 7:
+            return f"{days} days ago"
+        if days < 30:
+            return f"{days // 7} weeks ago"
+        if days < 365:
+            return f"{days // 30} months ago"
+        return f"{days // 365} years ago"
+    if seconds > 3600:
+        return f"{seconds // 3600} hours ago"
+    if seconds > 60:
+        return f"{seconds // 60} minutes ago"
+    return "just now"
+
+def _describe_since(timestamp: str, now: datetime) -> str:
     try:
-        dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
-        now = datetime.utcnow()
-        diff = now - dt
-        
-        if diff.days > 0:
-            if diff.days == 1:
-                return "yesterday"
-            elif diff.days < 7:
-                return f"{diff.days} days ago"
-            elif diff.days < 30:
-                weeks = diff.days // 7
-                return f"{weeks} weeks ago"
-            elif diff.days < 365:
-                months = diff.days // 30
-                return f"{months} months ago"
-            else:
-                years = diff.days // 365
-                return f"{years} years ago"
-        elif diff.seconds > 3600:
-            hours = diff.seconds // 3600
-            return f"{hours} hours ago"
-        elif diff.seconds > 60:
-            minutes = diff.seconds // 60
-            return f"{minutes} minutes ago"
-        else:
-            return "just now"
-            
+        diff = now - _parse_timestamp(timestamp)
     except ValueError:
         return "unknown time"
+    return _relative_desc(diff.days, diff.seconds)
+
+def get_relative_time_description(timestamp: str) -> str:
+    """Get relative time description"""
+    return _describe_since(timestamp, _utcnow())
+
+def render_relative_times(timestamps: List[str]) -> List[str]:
+    """Get relative time descriptions for a list of timestamps, all measured against one 'now'"""
+    now = _utcnow()
+    return [_describe_since(timestamp, now) for timestamp in timestamps]
 
 def is_within_time_range(
     timestamp: str,
@@ -148,15 +181,15 @@ def is_within_time_range(
 ) -> bool:
     """Check if timestamp is within specified range"""
     try:
-        dt = datetime.fromisoformat(timestamp.replace('Z', '+00:00'))
+        dt = _parse_timestamp(timestamp)
         
         if start_date:
-            start_dt = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
+            start_dt = _parse_timestamp(start_date)
             if dt < start_dt:
                 return False
         
         if end_date:
-            end_dt = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
+            end_dt = _parse_timestamp(end_date)
             if dt > end_dt:
                 return False
         
@@ -1,17 +1,42 @@
 # Memory-related utility functions
+import re
 import uuid
 import hashlib
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Optional, Tuple
 import numpy as np
 
+try:
+    import numba
+except ImportError:  # Optional: only needed for the specialized similarity kernel
+    numba = None
+
+try:
+    from blake3 import blake3 as _content_hasher
+except ImportError:  # Optional: SHA-256 is hardware-accelerated (SHA-NI / ARMv8) via OpenSSL
+    _content_hasher = hashlib.sha256
+
+# MinHash parameters: fixed seed so signatures stay comparable across processes
+MINHASH_PERMUTATIONS = 64
+_MINHASH_PRIME = np.uint64((1 << 61) - 1)
+_minhash_rng = np.random.default_rng(1)
+_MINHASH_A = _minhash_rng.integers(1, 1 << 32, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+_MINHASH_B = _minhash_rng.integers(0, 1 << 32, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+_TOKEN_PATTERN = re.compile(r'\w+')
+
+_uuid4 = uuid.uuid4
+
 def generate_memory_id() -> str:
-    """Generate unique memory ID"""
-    return str(uuid.uuid4())
+    """Generate unique memory ID (32 hex characters, random UUID without dashes)"""
+    return _uuid4().hex
 
 def generate_content_hash(content: str) -> str:
     """Generate content hash for deduplication"""
-    return hashlib.md5(content.encode('utf-8')).hexdigest()
+    return generate_content_hash_bytes(content.encode('utf-8'))
+
+def generate_content_hash_bytes(content: bytes) -> str:
+    """Generate content hash for already-encoded content (128-bit hex digest)"""
+    return _content_hasher(content).hexdigest()[:32]
 
 def format_timestamp(timestamp: datetime = None) -> str:
     """Format timestamp"""
@@ -21,8 +46,8 @@ def format_timestamp(timestamp: datetime = None) -> str:
 
 def calculate_similarity(embedding1: List[float], embedding2: List[float]) -> float:
     """Calculate cosine similarity between two vectors"""
-    vec1 = np.array(embedding1)
-    vec2 = np.array(embedding2)
+    vec1 = np.asarray(embedding1, dtype=np.float32)
+    vec2 = np.asarray(embedding2, dtype=np.float32)
     
     # Calculate cosine similarity
     similarity = np.dot(vec1, vec2) / (
@@ -31,6 +56,129 @@ def calculate_similarity(embedding1: List[float], embedding2: List[float]) -> fl
     
     return float(similarity)
 
+def normalize_vector(embedding: List[float]) -> np.ndarray:
+    """Return the embedding as a unit-length float32 vector (zero vectors are returned unchanged)"""
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+def calculate_similarity_batch(
+    query_embedding: List[float],
+    embedding_matrix: np.ndarray,
+    query_normalized: bool = False
+) -> np.ndarray:
+    """
+    Calculate cosine similarities between one query and many stored embeddings
+    
+    Args:
+        query_embedding: Query vector
+        embedding_matrix: (N, D) float32 matrix of unit-normalized rows (normalize on insertion)
+        query_normalized: Whether the query is already unit-normalized
+        
+    Returns:
+        np.ndarray: (N,) cosine similarities, computed with a single matrix-vector product
+    """
+    query = np.asarray(query_embedding, dtype=np.float32)
+    if not query_normalized:
+        query = normalize_vector(query)
+    return embedding_matrix @ query
+
+def quantize_int8(vector: np.ndarray) -> Tuple[np.ndarray, float]:
+    """Quantize a vector to int8 codes with a per-vector scale (vector ~= codes * scale)"""
+    peak = float(np.max(np.abs(vector)))
+    scale = peak / 127 if peak > 0 else 1.0
+    return np.round(vector / scale).astype(np.int8), scale
+
+def make_cosine_kernel(dim: int) -> Optional[Callable[[np.ndarray, int, np.ndarray], np.ndarray]]:
+    """
+    Build a similarity kernel specialized to a fixed embedding dimension
+    
+    `dim` is captured as a compile-time constant, so numba can fully unroll and
+    vectorize the inner loop; rows are scored in parallel threads and the
+    compiled code is cached on disk across restarts. Rows and query must be
+    unit-normalized float32, the kernel then returns cosine similarities for
+    the first `count` rows. For int8 rows use make_int8_dot_kernel.
+    
+    Args:
+        dim: Embedding dimension
+        
+    Returns:
+        Compiled kernel(matrix, count, query), or None if numba is not installed
+    """
+    if numba is None:
+        return None
+    
+    @numba.njit(parallel=True, fastmath=True, cache=True)
+    def cosine_kernel(matrix, count, query):
+        out = np.empty(count, dtype=np.float32)
+        for i in numba.prange(count):
+            acc = np.float32(0.0)
+            for j in range(dim):
+                acc += matrix[i, j] * query[j]
+            out[i] = acc
+        return out
+    
+    return cosine_kernel
+
+def make_int8_dot_kernel(dim: int) -> Optional[Callable[[np.ndarray, int, np.ndarray], np.ndarray]]:
+    """
+    Build an int8 dot-product kernel specialized to a fixed embedding dimension
+    
+    Rows and query are int8 codes (see quantize_int8); products are accumulated
+    in int32, so the matrix is never upcast to float. Multiply the result by the
+    row scales and the query scale to get cosine similarities.
+    
+    Args:
+        dim: Embedding dimension
+        
+    Returns:
+        Compiled kernel(matrix, count, query_codes) -> float32 dot products of the
+        first `count` rows, or None if numba is not installed
+    """
+    if numba is None:
+        return None
+    
+    @numba.njit(parallel=True, cache=True)
+    def int8_dot_kernel(matrix, count, query):
+        out = np.empty(count, dtype=np.float32)
+        for i in numba.prange(count):
+            acc = np.int32(0)
+            for j in range(dim):
+                acc += np.int32(matrix[i, j]) * np.int32(query[j])
+            out[i] = acc
+        return out
+    
+    return int8_dot_kernel
+
+def minhash_signature(text: str, shingle_size: int = 3) -> np.ndarray:
+    """
+    Compute a MinHash signature over word shingles
+    
+    The fraction of equal positions between two signatures estimates the
+    Jaccard similarity of their shingle sets.
+    
+    Args:
+        text: Input text
+        shingle_size: Words per shingle
+        
+    Returns:
+        np.ndarray: uint64 signature of length MINHASH_PERMUTATIONS
+    """
+    tokens = _TOKEN_PATTERN.findall(text.lower())
+    if len(tokens) > shingle_size:
+        shingles = {' '.join(tokens[i:i + shingle_size]) for i in range(len(tokens) - shingle_size + 1)}
+    else:
+        shingles = {' '.join(tokens)}
+    
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=4).digest(), 'little') for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles)
+    )
+    # (a * h + b) mod p for every permutation/shingle pair, then the minimum per permutation
+    permuted = (_MINHASH_A[:, None] * hashes[None, :] + _MINHASH_B[:, None]) % _MINHASH_PRIME
+    return permuted.min(axis=1)
+
 def create_memory_metadata(
     content: str,
     memory_type: str,
@@ -39,13 +187,15 @@ def create_memory_metadata(
     **kwargs
 ) -> Dict[str, Any]:
     """Create memory metadata"""
+    content_hash = generate_content_hash(content)
+    now = format_timestamp()
     return {
-        'content_hash': generate_content_hash(content),
+        'content_hash': content_hash,
         'memory_type': memory_type,
         'source': source,
         'tags': tags or [],
-        'created_at': format_timestamp(),
-        'updated_at': format_timestamp(),
+        'created_at': now,
+        'updated_at': now,
         **kwargs
     }
 
@@ -57,10 +207,15 @@ def validate_memory_data(data: Dict[str, Any]) -> bool:
         if field not in data:
             return False
     
-    # Verify embedding is a numeric list
-    if not isinstance(data['embedding'], list) or not all(
-        isinstance(x, (int, float)) for x in data['embedding']
-    ):
+    # Verify embedding is a 1-D numeric vector (list or ndarray), checked by dtype in one C pass
+    embedding = data['embedding']
+    if not isinstance(embedding, (list, np.ndarray)):
+        return False
+    try:
+        vector = np.asarray(embedding)
+    except (ValueError, TypeError):
+        return False
+    if vector.ndim != 1 or vector.dtype.kind not in 'fiu':
         return False
     
     return True
@@ -1,57 +1,88 @@
 # Text processing utility functions
 import re
 import string
+import hashlib
+import threading
 from typing import List, Dict, Any
 from collections import Counter
+import numpy as np
+from cachetools import LRUCache
+
+try:
+    import hyperscan
+except ImportError:  # Optional: falls back to one re.findall pass per entity type
+    hyperscan = None
+
+# Patterns compiled once at import
+_WHITESPACE_RE = re.compile(r'\s+')
+_SPECIAL_CHARS_RE = re.compile(r'[^\w\s.,!?;:()\-]')
+# ASCII characters removed by _SPECIAL_CHARS_RE, as a str.translate deletion table
+_ASCII_SPECIAL_CHARS_TABLE = {c: None for c in range(128) if _SPECIAL_CHARS_RE.match(chr(c))}
+_EMAIL_RE = re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b')
+_URL_RE = re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
+_PHONE_RE = re.compile(r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b')
+_DATE_RE = re.compile(r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b')
+_CJK_RE = re.compile(r'[\u4e00-\u9fff]')
+
+# Entity type -> pattern, scanned together when Hyperscan is available
+_ENTITY_PATTERNS = (
+    ('emails', _EMAIL_RE),
+    ('urls', _URL_RE),
+    ('phone_numbers', _PHONE_RE),
+    ('dates', _DATE_RE),
+)
+_entity_database = None
+_entity_lock = threading.Lock()
+
+# Memoized format_text_for_embedding results, keyed by 128-bit content hash
+# (results are up to 8000 characters, so entries are capped lower than the embedding cache)
+FORMAT_CACHE_SIZE = 2048
+_format_cache = LRUCache(maxsize=FORMAT_CACHE_SIZE)
+_format_cache_lock = threading.Lock()
+
+_PUNCTUATION_TABLE = str.maketrans('', '', string.punctuation)
+
+# Stop words (simplified version)
+_STOP_WORDS = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
+    'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'being',
+    'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could',
+    'should', 'may', 'might', 'must', 'can', 'this', 'that', 'these',
+    'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they', 'me', 'him',
+    'her', 'us', 'them', 'my', 'your', 'his', 'her', 'its', 'our', 'their'
+})
 
 def clean_text(text: str) -> str:
     """Clean text content"""
     if not text:
         return ""
     
-    # Remove extra whitespace
-    text = re.sub(r'\s+', ' ', text)
-    
     # Remove special characters but keep basic punctuation
-    text = re.sub(r'[^\w\s.,!?;:()\-]', '', text)
-    
-    # Strip leading and trailing whitespace
-    text = text.strip()
-    
-    return text
+    # (ASCII-only text goes through a C translate table instead of the regex)
+    if text.isascii():
+        text = text.translate(_ASCII_SPECIAL_CHARS_TABLE)
+    else:
+        text = _SPECIAL_CHARS_RE.sub('', text)
+    
+    # Remove extra whitespace, strip leading and trailing whitespace
+    return _WHITESPACE_RE.sub(' ', text).strip()
+
+def estimate_tokens(text: str) -> int:
+    """Conservative token estimate: Chinese characters 1.2x, English words 1.5x"""
+    chinese_chars = len(_CJK_RE.findall(text))
+    english_words = len(text.split())
+    return int(chinese_chars * 1.2 + english_words * 1.5)
 
 def extract_keywords(text: str, max_keywords: int = 10) -> List[str]:
     """Extract keywords"""
     if not text:
         return []
     
-    # Convert to lowercase
-    text = text.lower()
-    
-    # Remove punctuation
-    text = text.translate(str.maketrans('', '', string.punctuation))
-    
-    # Split into words
-    words = text.split()
-    
-    # Filter stop words (simplified version)
-    stop_words = {
-        'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for',
-        'of', 'with', 'by', 'is', 'are', 'was', 'were', 'be', 'been', 'being',
-        'have', 'has', 'had', 'do', 'does', 'did', 'will', 'would', 'could',
-        'should', 'may', 'might', 'must', 'can', 'this', 'that', 'these',
-        'those', 'i', 'you', 'he', 'she', 'it', 'we', 'they', 'me', 'him',
-        'her', 'us', 'them', 'my', 'your', 'his', 'her', 'its', 'our', 'their'
-    }
-    
-    # Filter words
-    filtered_words = [
-        word for word in words 
-        if len(word) > 2 and word not in stop_words
-    ]
-    
-    # Calculate word frequency
-    word_counts = Counter(filtered_words)
+    # Lowercase, strip punctuation, split and count in a single pass
+    word_counts = Counter()
+    for word in text.lower().translate(_PUNCTUATION_TABLE).split():
+        if len(word) > 2 and word not in _STOP_WORDS:
+            word_counts[word] += 1
     
     # Return most common words
     return [word for word, count in word_counts.most_common(max_keywords)]
@@ -78,32 +109,59 @@ def generate_summary(text: str, max_length: int = 200) -> str:
     
     return summary + "..."
 
+def _get_entity_database():
+    """Compile the entity patterns into one Hyperscan database (once, on first use)"""
+    global _entity_database
+    if _entity_database is None:
+        database = hyperscan.Database()
+        database.compile(
+            expressions=[pattern.pattern.encode('utf-8') for _, pattern in _ENTITY_PATTERNS],
+            ids=list(range(len(_ENTITY_PATTERNS))),
+            elements=len(_ENTITY_PATTERNS),
+            flags=[hyperscan.HS_FLAG_SOM_LEFTMOST] * len(_ENTITY_PATTERNS)
+        )
+        _entity_database = database
+    return _entity_database
+
+def _extract_entities_hyperscan(text: str) -> Dict[str, List[str]]:
+    """Extract all entity types in a single Hyperscan pass"""
+    data = text.encode('utf-8')
+    spans = [[] for _ in _ENTITY_PATTERNS]
+    
+    def on_match(pattern_id, start, end, flags, context):
+        spans[pattern_id].append((start, end))
+    
+    # A database's scratch space cannot be shared by concurrent scans
+    with _entity_lock:
+        _get_entity_database().scan(data, match_event_handler=on_match)
+    
+    # Hyperscan reports every match end; keep leftmost-longest, non-overlapping matches like re.findall
+    entities = {}
+    for (name, _), pattern_spans in zip(_ENTITY_PATTERNS, spans):
+        pattern_spans.sort(key=lambda span: (span[0], -span[1]))
+        matches = []
+        last_end = -1
+        for start, end in pattern_spans:
+            if start >= last_end:
+                matches.append(data[start:end].decode('utf-8', errors='ignore'))
+                last_end = end
+        entities[name] = list(dict.fromkeys(matches))
+    return entities
+
 def extract_entities(text: str) -> Dict[str, List[str]]:
-    """Extract entities (simplified version)"""
-    entities = {
-        'emails': [],
-        'urls': [],
-        'phone_numbers': [],
-        'dates': []
+    """Extract entities (simplified version), each list de-duplicated in first-seen order"""
+    if hyperscan is not None:
+        return _extract_entities_hyperscan(text)
+    
+    # Stream matches into an ordered dict so repeated entities are never materialized
+    return {
+        name: list(dict.fromkeys(match.group(0) for match in pattern.finditer(text)))
+        for name, pattern in _ENTITY_PATTERNS
     }
-    
-    # Extract emails
-    email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-    entities['emails'] = re.findall(email_pattern, text)
-    
-    # Extract URLs
-    url_pattern = r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'
-    entities['urls'] = re.findall(url_pattern, text)
-    
-    # Extract phone numbers (simplified version)
-    phone_pattern = r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b'
-    entities['phone_numbers'] = re.findall(phone_pattern, text)
-    
-    # Extract dates (simplified version)
-    date_pattern = r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b'
-    entities['dates'] = re.findall(date_pattern, text)
-    
-    return entities
+
+def _token_set(text: str) -> np.ndarray:
+    """Unique 32-bit hashes of the whitespace-separated words in text (sorted)"""
+    return np.unique(np.fromiter((hash(word) & 0xffffffff for word in text.split()), dtype=np.uint32))
 
 def calculate_text_similarity(text1: str, text2: str) -> float:
     """Calculate similarity between two texts (based on word overlap)"""
@@ -114,13 +172,13 @@ def calculate_text_similarity(text1: str, text2: str) -> float:
     clean_text1 = clean_text(text1).lower()
     clean_text2 = clean_text(text2).lower()
     
-    # Split into words
-    words1 = set(clean_text1.split())
-    words2 = set(clean_text2.split())
+    # Hashed word sets as sorted uint32 arrays
+    words1 = _token_set(clean_text1)
+    words2 = _token_set(clean_text2)
     
-    # Calculate Jaccard similarity
-    intersection = len(words1.intersection(words2))
-    union = len(words1.union(words2))
+    # Calculate Jaccard similarity (sorted-merge intersection in C)
+    intersection = np.intersect1d(words1, words2, assume_unique=True).size
+    union = words1.size + words2.size - intersection
     
     if union == 0:
         return 0.0
@@ -128,7 +186,19 @@ def calculate_text_similarity(text1: str, text2: str) -> float:
     return intersection / union
 
 def format_text_for_embedding(text: str) -> str:
-    """Format text for embedding generation"""
+    """Format text for embedding generation (memoized by content hash)"""
+    key = hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+    with _format_cache_lock:
+        cached = _format_cache.get(key)
+    if cached is not None:
+        return cached
+    
+    formatted = _format_text_for_embedding(text)
+    with _format_cache_lock:
+        _format_cache[key] = formatted
+    return formatted
+
+def _format_text_for_embedding(text: str) -> str:
     # Clean text
     cleaned = clean_text(text)
     